@@ -1,13 +1,24 @@
+import functools
+import hashlib
+import io
+import json
 import os
+import re
 import sys
-import tempfile
-from collections import deque
-from typing import Optional
-from urllib.parse import urlparse
-
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager, nullcontext, suppress
+from typing import Callable, IO, Iterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
 from dotenv import load_dotenv
 from google import genai
-from PIL import Image
+from google.genai import types
+from PIL import Image, ImageChops
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import sync_playwright
 
 load_dotenv()
@@ -42,55 +53,360 @@ DEFAULT_PROMPT = """You are a localization drift detector. You are given two scr
 - The drift must be obviously visible at a normal phone viewing distance.
 - When in doubt, do NOT flag it. Err heavily on the side of "no issues."
 
-For each drift, output a concise, actionable fix instruction for a coding agent. Format as plain text, one issue per line:
+For each drift, write a concise, actionable fix instruction for a coding agent as one entry in "issues", formatted as:
+
+[Element/area]: [What drifted from source] → [Suggested fix]
+
+Respond with JSON: {"has_issues": <true if any drift was found>, "issues": [<one entry per drift>]}.
+If the target faithfully reproduces the source layout (or differences are too minor to matter), respond with {"has_issues": false, "issues": []}.
+"""
 
-- [Element/area]: [What drifted from source] → [Suggested fix]
+BATCH_PROMPT = """**BATCH MODE:** The screenshots below come in numbered pairs. Each pair is introduced by a "Pair <index>:" label, followed by its source screenshot and then its target screenshot. Analyze every pair independently using the rules above — never compare screenshots from different pairs.
 
-If the target faithfully reproduces the source layout (or differences are too minor to matter), respond with: "No localization issues detected."
+Respond with a JSON array containing exactly one entry per pair: {"index": <pair index>, "has_issues": ..., "issues": [...]}.
 """
 
+NO_ISSUES_TEXT = "No localization issues detected."
+
+# Reported for a crawl pair whose target renders exactly like its source,
+# which usually means the target locale fell back to source-language content.
+UNTRANSLATED_TEXT = (
+    "- Whole screen: target renders identically to source, likely untranslated "
+    "→ Serve the target locale's translations for this route"
+)
+
+# Recognizes a clean verdict in free-text responses that ignored the schema;
+# schema-valid responses are judged by their has_issues flag instead.
+_NO_ISSUES_RE = re.compile(r"no localization issues", re.IGNORECASE)
+
+# Try multiple models in case of high demand
+# Using Gemini 3 flash preview (latest)
+GEMINI_MODELS = ["gemini-3-flash-preview", "gemini-2.0-flash-exp", "gemini-1.5-flash-latest"]
+
+# Number of (source, target) pairs sent to Gemini in a single request.
+BATCH_SIZE = 8
+
+# Screenshots are shrunk to fit this box and re-encoded as WEBP before upload.
+# Only the width is really capped: Gemini bills images by tile, and UI text
+# stays legible at 1024px wide. The height is bounded only by WEBP's limit, so
+# a tall full-page capture is uploaded whole rather than shrunk to fit.
+MAX_IMAGE_SIZE = (1024, 16383)
+WEBP_QUALITY = 85
+
+
+
+def _concurrency_from_env(value: Optional[str], default: int = 8) -> int:
+    """Parse PRISM_CONCURRENCY, falling back to default if it isn't a number.
+
+    The result is at least 1, since a zero-slot semaphore would block every
+    Gemini request forever.
+    """
+    if value is None:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"Ignoring PRISM_CONCURRENCY={value!r}: not a number; using {default}")
+        return default
+
+
+# Number of Gemini requests kept in flight at once, process-wide.
+CONCURRENCY = _concurrency_from_env(os.environ.get("PRISM_CONCURRENCY"))
+
+# Pages crawled between crawl state checkpoints.
+CHECKPOINT_INTERVAL = 10
+
+# How the crawler screenshots pages: "full" (entire scroll height), "viewport"
+# (above the fold only, no viewport resize) or "tiled" (one viewport-sized
+# screenshot per scroll step, each analyzed as its own pair).
+CAPTURE_MODE = os.environ.get("PRISM_CAPTURE_MODE", "full")
+
+# Upper bound on tiles per page in "tiled" mode.
+MAX_TILES = 10
+
+# Crawl screenshots are captured as JPEG: much faster for Chromium to encode
+# than PNG and smaller to hold in memory. They are re-encoded as WEBP for
+# upload anyway, so lossless capture buys nothing.
+SCREENSHOT_JPEG_QUALITY = 85
+
+# Crawl screenshots stay in memory; set this to also keep a copy on disk.
+SCREENSHOT_DIR = os.environ.get("PRISM_SCREENSHOT_DIR")
+
+# Crawl screenshot pairs where no pixel channel differs by more than this are
+# treated as visually identical (tolerant of JPEG and anti-aliasing noise).
+# They skip the model call and are reported as untranslated instead.
+PIXEL_DIFF_THRESHOLD = 24
+
+# Routes whose last path segment has a file extension outside this set (e.g.
+# "/guide.pdf") are checked with an HTTP HEAD before rendering them in
+# Chromium, and skipped if missing or not HTML. Ordinary page routes are
+# never probed, so they pay no extra request.
+HTTP_PROBE = os.environ.get("PRISM_HTTP_PROBE", "1") != "0"
+_HTML_EXTENSIONS = frozenset({"", ".html", ".htm", ".php", ".asp", ".aspx", ".jsp"})
+
+# A boolean verdict lets the model answer a clean pair in a handful of tokens.
+_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "has_issues": {"type": "boolean"},
+        "issues": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["has_issues", "issues"],
+}
+
+_BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "index": {"type": "integer"},
+            **_ANALYSIS_SCHEMA["properties"],
+        },
+        "required": ["index", *_ANALYSIS_SCHEMA["required"]],
+    },
+}
+
 
 def analyze_localization(
-    source_image_path: str,
-    target_image_path: str,
+    source_image: str | bytes,
+    target_image: str | bytes,
     prompt: Optional[str] = None,
     max_retries: int = 3,
 ) -> str:
     """Compare source and target app screenshots to find localization issues.
 
+    Results are cached on disk (see CACHE_DIR) keyed by both screenshots'
+    contents, the prompt and the model; set PRISM_CACHE_DISABLE=1 to bypass.
+
     Args:
-        source_image_path: Path to the source language screenshot.
-        target_image_path: Path to the target/localized language screenshot.
+        source_image: Path to, or encoded bytes of, the source language
+            screenshot.
+        target_image: Path to, or encoded bytes of, the target/localized
+            language screenshot.
         prompt: Custom prompt to send to the model. Uses DEFAULT_PROMPT if None.
         max_retries: Maximum number of retry attempts for API calls.
 
     Returns:
         Plain text fix-it instructions for a coding agent.
     """
-    import time
+    client = _get_client()
+    prompt = prompt or DEFAULT_PROMPT
 
+    key = None
+    if _cache_enabled():
+        key = _cache_key(GEMINI_MODELS[0], source_image, target_image, prompt)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
+    analysis, model = _analyze_pair(client, source_image, target_image, prompt, max_retries)
+    # Keys name the primary model, so a fallback model's answer isn't cached.
+    if key is not None and model == GEMINI_MODELS[0]:
+        _cache_put(key, analysis)
+    return analysis
+
+
+def analyze_localization_batch(
+    pairs: list[tuple[str | bytes, str | bytes]],
+    prompt: Optional[str] = None,
+    max_retries: int = 3,
+) -> list[str]:
+    """Compare several source/target screenshot pairs in a single model request.
+
+    Pairs with a cached analysis are answered from the cache and left out of
+    the request.
+
+    Args:
+        pairs: List of (source_image, target_image) tuples, each image
+            given as a file path or encoded bytes.
+        prompt: Custom prompt to send to the model. Uses DEFAULT_PROMPT if None.
+        max_retries: Maximum number of retry attempts for API calls.
+
+    Returns:
+        One plain text analysis per pair, in the same order as ``pairs``.
+    """
+    if not pairs:
+        return []
+
+    client = _get_client()
+    prompt = prompt or DEFAULT_PROMPT
+
+    results: list[Optional[str]] = [None] * len(pairs)
+    keys: list[Optional[str]] = [None] * len(pairs)
+    if _cache_enabled():
+        for index, (source_image, target_image) in enumerate(pairs):
+            keys[index] = _cache_key(GEMINI_MODELS[0], source_image, target_image, prompt)
+            results[index] = _cache_get(keys[index])
+
+    pending = [index for index, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    contents: list = [prompt, BATCH_PROMPT]
+    for batch_index, index in enumerate(pending):
+        source_image, target_image = pairs[index]
+        contents.append(f"Pair {batch_index}:")
+        contents.append(_image_part(source_image))
+        contents.append(_image_part(target_image))
+
+    text, batch_model = _generate_content(
+        client,
+        contents,
+        max_retries,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=_BATCH_RESPONSE_SCHEMA,
+        ),
+    )
+
+    for index, analysis in zip(pending, _parse_batch_response(text, len(pending))):
+        model = batch_model
+        # The model occasionally drops or mangles an entry; analyze those pairs on their own.
+        if analysis is None:
+            source_image, target_image = pairs[index]
+            analysis, model = _analyze_pair(
+                client, source_image, target_image, prompt, max_retries
+            )
+        if keys[index] is not None and model == GEMINI_MODELS[0]:
+            _cache_put(keys[index], analysis)
+        results[index] = analysis
+
+    return results
+
+
+def _get_client() -> genai.Client:
+    """Return the shared Gemini client for the configured API key.
+
+    Reusing one client keeps its HTTP connection pool warm across requests
+    and analysis worker threads.
+    """
+    # Checked before the cached call so a missing key is never memoized.
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY environment variable is not set")
+    return _get_genai_client(api_key)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_genai_client(api_key: str) -> genai.Client:
+    """Build the Gemini client; cached so every caller shares it."""
+    return genai.Client(api_key=api_key)
+
 
-    source_image = Image.open(source_image_path)
-    target_image = Image.open(target_image_path)
+def _analyze_pair(
+    client,
+    source_image: str | bytes,
+    target_image: str | bytes,
+    prompt: str,
+    max_retries: int,
+) -> tuple[str, str]:
+    """Send a single source/target pair to Gemini, bypassing the cache.
 
-    client = genai.Client(api_key=api_key)
+    Returns the analysis and the model that produced it.
+    """
+    # Prompt first: a stable prefix lets Gemini's implicit prompt cache reuse it.
+    text, model = _generate_content(
+        client,
+        [prompt, _image_part(source_image), _image_part(target_image)],
+        max_retries,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=_ANALYSIS_SCHEMA,
+        ),
+    )
+
+    try:
+        analysis = _format_analysis(json.loads(text))
+    except (TypeError, ValueError):
+        analysis = None
+    if analysis is None:
+        # The model ignored the schema: keep its raw text, normalizing a clean
+        # verdict so callers only ever need to compare with NO_ISSUES_TEXT.
+        analysis = NO_ISSUES_TEXT if _NO_ISSUES_RE.search(text) else text
+    return analysis, model
+
+
+def _image_part(image: str | bytes) -> types.Part:
+    """Wrap a screenshot (path or encoded bytes) for upload as a downscaled WEBP."""
+    return types.Part.from_bytes(data=_prepare_image(image), mime_type="image/webp")
+
+
+def _prepare_image(image: str | bytes) -> bytes:
+    """Downscale an image to fit MAX_IMAGE_SIZE and encode it as WEBP."""
+    with Image.open(io.BytesIO(image) if isinstance(image, bytes) else image) as img:
+        img = img.convert("RGB")
+        img.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP", quality=WEBP_QUALITY)
+    return buf.getvalue()
+
+
+def _parse_batch_response(text: str, count: int) -> list[Optional[str]]:
+    """Map a batch JSON response onto pair indices; missing entries are None."""
+    results: list[Optional[str]] = [None] * count
+    try:
+        entries = json.loads(text)
+    except (TypeError, ValueError):
+        return results
+
+    if not isinstance(entries, list):
+        return results
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("index")
+        if isinstance(index, int) and 0 <= index < count:
+            results[index] = _format_analysis(entry)
+    return results
 
-    # Try multiple models in case of high demand
-    # Using Gemini 3 flash preview (latest)
-    models = ["gemini-3-flash-preview", "gemini-2.0-flash-exp", "gemini-1.5-flash-latest"]
 
+def _format_analysis(result) -> Optional[str]:
+    """Render a {has_issues, issues} response as plain text fix-it lines.
+
+    Returns NO_ISSUES_TEXT when nothing was flagged, or None if the response
+    does not match _ANALYSIS_SCHEMA.
+    """
+    if not isinstance(result, dict):
+        return None
+    has_issues = result.get("has_issues")
+    issues = result.get("issues")
+    if not isinstance(has_issues, bool) or not isinstance(issues, list):
+        return None
+
+    lines = [issue.strip() for issue in issues if isinstance(issue, str) and issue.strip()]
+    if not has_issues or not lines:
+        return NO_ISSUES_TEXT
+    return "\n".join(line if line.startswith("-") else f"- {line}" for line in lines)
+
+
+# Caps Gemini requests in flight across every analysis pool, however many
+# worker threads callers ask for. Retry backoff sleeps happen outside it so a
+# throttled request doesn't hold a slot while it waits.
+_gemini_slots = threading.BoundedSemaphore(CONCURRENCY)
+
+
+def _generate_content(
+    client,
+    contents: list,
+    max_retries: int,
+    config: Optional[types.GenerateContentConfig] = None,
+) -> tuple[str, str]:
+    """Send contents to Gemini, retrying and falling back across GEMINI_MODELS.
+
+    Returns the response text and the model that produced it.
+    """
     last_error = None
-    for model in models:
+    for model in GEMINI_MODELS:
         for attempt in range(max_retries):
             try:
-                response = client.models.generate_content(
-                    model=model,
-                    contents=[source_image, target_image, prompt or DEFAULT_PROMPT],
-                )
-                return response.text
+                with _gemini_slots:
+                    response = client.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=config,
+                    )
+                return response.text, model
             except Exception as e:
                 last_error = e
                 error_str = str(e).lower()
@@ -134,11 +450,167 @@ def analyze_localization(
     )
 
 
+# ---------------------------------------------------------------------------
+# LLM response cache
+# ---------------------------------------------------------------------------
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "prism", "llm_cache")
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+cache_stats = {"hits": 0, "misses": 0}
+_cache_stats_lock = threading.Lock()
+
+
+def _cache_enabled() -> bool:
+    """Return False when PRISM_CACHE_DISABLE=1 is set."""
+    return os.environ.get("PRISM_CACHE_DISABLE") != "1"
+
+
+def _file_digest(path: str) -> bytes:
+    """Return the SHA-256 digest of a file's contents.
+
+    Digests are memoized per (path, mtime, size), so a screenshot compared
+    against several locales, and again for its cache key, is read once.
+    """
+    st = os.stat(path)
+    return _file_digest_cached(path, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=4096)
+def _file_digest_cached(path: str, mtime_ns: int, size: int) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").digest()
+
+
+def _image_digest(image: str | bytes) -> bytes:
+    """Return the SHA-256 digest of a screenshot given as a path or bytes."""
+    if isinstance(image, bytes):
+        return hashlib.sha256(image).digest()
+    return _file_digest(image)
+
+
+def _cache_key(
+    model: str, source_image: str | bytes, target_image: str | bytes, prompt: str
+) -> str:
+    """Build a cache key from the model, both screenshots' bytes and the prompt."""
+    digest = hashlib.sha256()
+    digest.update(model.encode())
+    digest.update(_image_digest(source_image))
+    digest.update(_image_digest(target_image))
+    digest.update(prompt.encode())
+    return digest.hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Return the cached analysis for key, or None if missing, malformed or expired."""
+    try:
+        with open(os.path.join(CACHE_DIR, f"{key}.json")) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        _count_cache("misses")
+        return None
+
+    if (
+        not isinstance(entry, dict)
+        or not isinstance(entry.get("analysis"), str)
+        or not isinstance(entry.get("created"), (int, float))
+        or time.time() - entry["created"] > CACHE_TTL_SECONDS
+    ):
+        _count_cache("misses")
+        return None
+
+    _count_cache("hits")
+    return entry["analysis"]
+
+
+def _count_cache(outcome: str) -> None:
+    """Increment a cache_stats counter; lookups run on analysis worker threads."""
+    with _cache_stats_lock:
+        cache_stats[outcome] += 1
+
+
+def _cache_put(key: str, analysis: str) -> None:
+    """Store an analysis on disk under key.
+
+    Write failures are reported and ignored so the caller still gets the
+    analysis it already paid for.
+    """
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({"created": time.time(), "analysis": analysis}, f)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        print(f"Not caching analysis in {CACHE_DIR}: {exc}")
+        with suppress(OSError):
+            os.remove(tmp_path)
+
+
+def _cache_stats_summary() -> Optional[str]:
+    """Describe LLM cache hit/miss counters, or None if it was never consulted."""
+    if not (cache_stats["hits"] or cache_stats["misses"]):
+        return None
+    return (
+        f"LLM cache: {cache_stats['hits']} hit(s), "
+        f"{cache_stats['misses']} miss(es)"
+    )
+
+
+def _print_cache_stats() -> None:
+    """Print LLM cache hit/miss counters if the cache was consulted."""
+    summary = _cache_stats_summary()
+    if summary:
+        print(summary)
+
+
+def _chunked(items: list, size: int) -> Iterator[list]:
+    """Yield successive slices of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@contextmanager
+def _analysis_pool(max_workers: int) -> Iterator[ThreadPoolExecutor]:
+    """Thread pool for Gemini requests that drops queued work if the caller fails."""
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield executor
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
 # ---------------------------------------------------------------------------
 # Crawler helpers
 # ---------------------------------------------------------------------------
 
 
+def _make_locale_stripper(*locales: str) -> Callable[[str], str]:
+    """Build a function that removes the first matching locale prefix.
+
+    The "/{locale}" prefixes are formatted once here rather than on every
+    call, since the crawler runs the stripper for each discovered link.
+
+    >>> strip = _make_locale_stripper("en", "fr")
+    >>> strip("/fr/about"), strip("/en"), strip("/english")
+    ('/about', '/', '/english')
+    """
+    prefixes = [(f"/{locale}", f"/{locale}/") for locale in locales]
+
+    def strip(path: str) -> str:
+        for exact, with_slash in prefixes:
+            if path == exact:
+                return "/"
+            if path.startswith(with_slash):
+                return path[len(exact):]
+        return path
+
+    return strip
+
+
 def _strip_locale_prefix(path: str, locale: str) -> str:
     """Remove a locale prefix from a URL path.
 
@@ -147,12 +619,32 @@ def _strip_locale_prefix(path: str, locale: str) -> str:
     >>> _strip_locale_prefix("/en", "en")
     '/'
     """
-    prefix = f"/{locale}"
-    if path == prefix:
-        return "/"
-    if path.startswith(prefix + "/"):
-        return path[len(prefix):]
-    return path
+    return _make_locale_stripper(locale)(path)
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_base(base_url: str) -> tuple[str, str]:
+    """Split a crawl's base URL once into (netloc, base URL without trailing slash).
+
+    >>> _parse_base("https://example.com:8080/")
+    ('example.com:8080', 'https://example.com:8080')
+    """
+    return urlsplit(base_url).netloc, base_url.rstrip("/")
+
+
+def _make_url_builder(base_url: str) -> Callable[[str, str], str]:
+    """Build a (locale, route) -> URL function for a fixed base URL.
+
+    >>> build = _make_url_builder("https://example.com/")
+    >>> build("fr", "/about")
+    'https://example.com/fr/about'
+    """
+    _, base = _parse_base(base_url)
+
+    def build(locale: str, route: str) -> str:
+        return f"{base}/{locale}{route}"
+
+    return build
 
 
 def _build_locale_url(base_url: str, locale: str, route: str) -> str:
@@ -163,7 +655,10 @@ def _build_locale_url(base_url: str, locale: str, route: str) -> str:
     >>> _build_locale_url("https://example.com", "en", "/")
     'https://example.com/en/'
     """
-    return f"{base_url.rstrip('/')}/{locale}{route}"
+    return _make_url_builder(base_url)(locale, route)
+
+
+_SAFE_FN_TABLE = str.maketrans("/", "_")
 
 
 def _safe_filename(route: str) -> str:
@@ -174,10 +669,7 @@ def _safe_filename(route: str) -> str:
     >>> _safe_filename("/")
     'index'
     """
-    cleaned = route.strip("/")
-    if not cleaned:
-        return "index"
-    return cleaned.replace("/", "_")
+    return route.strip("/").translate(_SAFE_FN_TABLE) or "index"
 
 
 # ---------------------------------------------------------------------------
@@ -204,6 +696,22 @@ def _parse_device_key(dirname: str) -> Optional[tuple[str, str]]:
     return device_key, locale
 
 
+def _subdirs(path: str) -> list[os.DirEntry]:
+    """List subdirectories of path, in directory order.
+
+    os.scandir() reports entry types from the directory listing itself, so
+    this avoids a stat() call per entry.
+    """
+    with os.scandir(path) as it:
+        return [e for e in it if e.is_dir()]
+
+
+def _list_pngs(path: str) -> set[str]:
+    """Return the names of PNG files directly inside path."""
+    with os.scandir(path) as it:
+        return {e.name for e in it if e.name.lower().endswith(".png")}
+
+
 def _group_device_dirs(
     screenshots_dir: str,
 ) -> dict[str, dict[str, str]]:
@@ -218,47 +726,47 @@ def _group_device_dirs(
     groups: dict[str, dict[str, str]] = {}
 
     # First, try flat structure (direct device directories)
-    for entry in sorted(os.listdir(screenshots_dir)):
-        full_path = os.path.join(screenshots_dir, entry)
-        if not os.path.isdir(full_path):
-            continue
-
-        parsed = _parse_device_key(entry)
+    for entry in _subdirs(screenshots_dir):
+        parsed = _parse_device_key(entry.name)
         if parsed is not None:
             device_key, locale = parsed
-            groups.setdefault(device_key, {})[locale] = full_path
+            _add_device_dir(groups, device_key, locale, entry.path)
 
     # If no devices found, try nested FTL structure (locale/ftl-results-*/device/)
     if not groups:
-        for locale_entry in sorted(os.listdir(screenshots_dir)):
-            locale_dir = os.path.join(screenshots_dir, locale_entry)
-            if not os.path.isdir(locale_dir):
-                continue
-
+        for locale_entry in _subdirs(screenshots_dir):
             # Look for ftl-results-* subdirectories
-            for results_entry in sorted(os.listdir(locale_dir)):
-                results_dir = os.path.join(locale_dir, results_entry)
-                if not os.path.isdir(results_dir):
-                    continue
-
+            for results_entry in _subdirs(locale_entry.path):
                 # Look for device directories
-                for device_entry in sorted(os.listdir(results_dir)):
-                    device_dir = os.path.join(results_dir, device_entry)
-                    if not os.path.isdir(device_dir):
-                        continue
-
-                    parsed = _parse_device_key(device_entry)
+                for device_entry in _subdirs(results_entry.path):
+                    parsed = _parse_device_key(device_entry.name)
                     if parsed is not None:
                         device_key, locale = parsed
+                        device_dir = device_entry.path
                         # Use artifacts subdirectory if it exists
                         artifacts_dir = os.path.join(device_dir, "artifacts")
                         if os.path.isdir(artifacts_dir):
                             device_dir = artifacts_dir
-                        groups.setdefault(device_key, {})[locale] = device_dir
+                        _add_device_dir(groups, device_key, locale, device_dir)
 
     return groups
 
 
+def _add_device_dir(
+    groups: dict[str, dict[str, str]], device_key: str, locale: str, path: str
+) -> None:
+    """Record a device directory; on a clash the greatest path wins.
+
+    Directory listings are unordered, so this keeps the choice between e.g.
+    two ftl-results-* runs independent of iteration order (the later run,
+    as the sorted listing used to pick).
+    """
+    locale_dirs = groups.setdefault(device_key, {})
+    current = locale_dirs.get(locale)
+    if current is None or path > current:
+        locale_dirs[locale] = path
+
+
 # ---------------------------------------------------------------------------
 # FTL analyze
 # ---------------------------------------------------------------------------
@@ -268,17 +776,22 @@ def ftl_analyze(
     screenshots_dir: str,
     source_locale: str,
     target_locales: list[str],
+    sink: Optional[Callable[[dict], None]] = None,
 ) -> list[dict]:
     """Analyze FTL screenshots across locales for localization drift.
 
     Walks the screenshots directory, groups device subdirs by device key,
     then compares matched PNG files between source and target locales
-    using analyze_localization().
+    using analyze_localization_batch(), BATCH_SIZE pairs per request.
+    Byte-identical pairs are skipped without a model call, and a pair whose
+    contents were already seen on another device reuses that result.
 
     Args:
         screenshots_dir: Path to the FTL screenshots root directory.
         source_locale: The source locale code (e.g. "en").
         target_locales: List of target locale codes to compare against.
+        sink: Called with each issue as soon as its batch finishes, in
+            completion order. Use it to report progress on long runs.
 
     Returns:
         List of issue dicts with keys: device, target_locale, filename, analysis.
@@ -292,25 +805,87 @@ def ftl_analyze(
         )
 
     groups = _group_device_dirs(screenshots_dir)
-    issues: list[dict] = []
+
+    with _analysis_pool(CONCURRENCY) as executor:
+        pending = _submit_ftl_batches(
+            executor, groups, source_locale, target_locales
+        )
+        batch_issues: list[list[dict]] = [[] for _ in pending]
+        batch_index = {future: i for i, (*_, future) in enumerate(pending)}
+
+        for future in as_completed(batch_index):
+            i = batch_index[future]
+            owners_per_pair, _ = pending[i]
+            for owners, analysis in zip(owners_per_pair, future.result()):
+                if analysis == NO_ISSUES_TEXT:
+                    continue
+                for device_key, target_locale, filename in owners:
+                    issue = {
+                        "device": device_key,
+                        "target_locale": target_locale,
+                        "filename": filename,
+                        "analysis": analysis,
+                    }
+                    batch_issues[i].append(issue)
+                    if sink is not None:
+                        sink(issue)
+
+    # Return in submission order so the report is deterministic.
+    return [issue for issues in batch_issues for issue in issues]
+
+
+def _jsonl_sink(f: Optional[IO[str]]) -> Callable[[dict], None]:
+    """Build an ftl_analyze() sink that appends each issue to f as a JSON line.
+
+    With f None, issues are only announced on stdout.
+    """
+    def write(issue: dict) -> None:
+        if f is not None:
+            f.write(json.dumps(issue, ensure_ascii=False) + "\n")
+            f.flush()
+        print(f"  [{issue['device']}/{issue['target_locale']}] Issues found in {issue['filename']}")
+    return write
+
+
+def _submit_ftl_batches(
+    executor: ThreadPoolExecutor,
+    groups: dict[str, dict[str, str]],
+    source_locale: str,
+    target_locales: list[str],
+) -> list[tuple[list[list[tuple[str, str, str]]], Future]]:
+    """Queue one analyze_localization_batch() call per BATCH_SIZE matched files.
+
+    Devices often render a screen identically, so each distinct
+    (source, target) content pair is analyzed once and its result shared by
+    every (device, locale, filename) that produced it.
+
+    Returns: [(owners_per_pair, future)] where owners_per_pair[i] lists the
+    (device_key, target_locale, filename) tuples the batch's i-th result
+    applies to.
+    """
+    pending: list[tuple[list[list[tuple[str, str, str]]], Future]] = []
+    owners_by_content: dict[tuple[bytes, bytes], list[tuple[str, str, str]]] = {}
+    wanted_locales = {source_locale, *target_locales}
 
     for device_key, locale_dirs in groups.items():
         source_dir = locale_dirs.get(source_locale)
         if source_dir is None:
             continue
 
-        source_pngs = {
-            f for f in os.listdir(source_dir) if f.lower().endswith(".png")
+        # List each locale directory once, however often it is compared.
+        pngs_by_locale = {
+            locale: _list_pngs(locale_dir)
+            for locale, locale_dir in locale_dirs.items()
+            if locale in wanted_locales
         }
+        source_pngs = pngs_by_locale[source_locale]
 
         for target_locale in target_locales:
             target_dir = locale_dirs.get(target_locale)
             if target_dir is None:
                 continue
 
-            target_pngs = {
-                f for f in os.listdir(target_dir) if f.lower().endswith(".png")
-            }
+            target_pngs = pngs_by_locale[target_locale]
 
             matched = source_pngs & target_pngs
             skipped = (source_pngs | target_pngs) - matched
@@ -320,43 +895,202 @@ def ftl_analyze(
                     f"Skipped {len(skipped)} unmatched file(s)"
                 )
 
+            # ((source_path, target_path), owners sharing that pair's result)
+            queued: list[tuple[tuple[str, str], list[tuple[str, str, str]]]] = []
+            identical = 0
+            reused = 0
             for filename in sorted(matched):
                 source_path = os.path.join(source_dir, filename)
                 target_path = os.path.join(target_dir, filename)
+                content = (_file_digest(source_path), _file_digest(target_path))
 
-                analysis = analyze_localization(source_path, target_path)
+                # Byte-identical screenshots cannot have drifted; don't spend a
+                # model call on them.
+                if content[0] == content[1]:
+                    identical += 1
+                    continue
 
-                if "no localization issues" not in analysis.lower():
-                    issues.append({
-                        "device": device_key,
-                        "target_locale": target_locale,
-                        "filename": filename,
-                        "analysis": analysis,
-                    })
+                owner = (device_key, target_locale, filename)
+                if content in owners_by_content:
+                    owners_by_content[content].append(owner)
+                    reused += 1
+                    continue
 
-    return issues
+                owners_by_content[content] = [owner]
+                queued.append(((source_path, target_path), owners_by_content[content]))
+
+            if identical:
+                print(
+                    f"  [{device_key}/{target_locale}] "
+                    f"Skipped {identical} identical file(s)"
+                )
+            if reused:
+                print(
+                    f"  [{device_key}/{target_locale}] "
+                    f"Reusing results for {reused} file(s) seen on other devices"
+                )
+
+            for chunk in _chunked(queued, BATCH_SIZE):
+                future = executor.submit(
+                    analyze_localization_batch, [pair for pair, _ in chunk]
+                )
+                pending.append(([owners for _, owners in chunk], future))
+
+    return pending
+
+
+# Collect same-host link paths with plain DOM APIs, bypassing Playwright's
+# selector engine. Filtering and trailing-slash/query/fragment removal happen
+# in the page so external links never cross the CDP connection, and the paths
+# come back newline-joined (URL paths cannot contain a raw newline) as one
+# string rather than a JSON array of thousands of small strings.
+_LINKS_JS = """host => {
+    const paths = new Set();
+    for (const a of document.querySelectorAll('a[href]')) {
+        let url;
+        try {
+            url = new URL(a.href);
+        } catch (e) {
+            continue;
+        }
+        if (url.host !== host) continue;
+        paths.add(url.pathname.replace(/\\/+$/, '') || '/');
+    }
+    return [...paths].join('\\n');
+}"""
+
+
+def _load_page(page, url: str) -> None:
+    """Navigate to url and wait for the load event, but at most 5s past DOM ready.
+
+    Waiting for "networkidle" stalls for the full timeout on pages that keep
+    long-poll or analytics connections open.
+    """
+    page.goto(url, wait_until="domcontentloaded", timeout=30000)
+    try:
+        page.wait_for_load_state("load", timeout=5000)
+    except PlaywrightTimeoutError:
+        pass  # Screenshot whatever has rendered so far
 
 
-def _extract_same_domain_links(page, base_url: str) -> set[str]:
-    """Extract all same-domain links from the page, normalized to paths without query/fragment."""
-    parsed_base = urlparse(base_url)
-    base_domain = parsed_base.netloc
+def _capture(page) -> list[bytes]:
+    """Screenshot the current page according to CAPTURE_MODE.
 
-    hrefs = page.eval_on_selector_all("a[href]", "els => els.map(e => e.href)")
+    Returns the JPEG-encoded screenshots, top to bottom. They are kept in
+    memory; nothing is written to disk.
+    """
+    if CAPTURE_MODE == "viewport":
+        return [_screenshot(page)]
+
+    if CAPTURE_MODE == "tiled":
+        viewport = page.viewport_size or {"height": 720}
+        step = viewport["height"]
+        height = page.evaluate("() => document.documentElement.scrollHeight")
+        offsets = range(0, max(height, 1), step)
+        if len(offsets) > MAX_TILES:
+            print(
+                f"  Page is {height}px tall; only the top "
+                f"{MAX_TILES * step}px ({MAX_TILES} tiles) will be compared"
+            )
+        shots = []
+        for y in offsets[:MAX_TILES]:
+            page.evaluate("y => window.scrollTo(0, y)", y)
+            shots.append(_screenshot(page))
+        return shots
+
+    return [_screenshot(page, full_page=True)]
+
+
+def _screenshot(page, full_page: bool = False) -> bytes:
+    """Capture the page as JPEG bytes."""
+    return page.screenshot(
+        type="jpeg", quality=SCREENSHOT_JPEG_QUALITY, full_page=full_page
+    )
+
+
+def _visually_identical(source: bytes, target: bytes) -> bool:
+    """Return True if two encoded screenshots differ by no more than noise.
+
+    Screenshots of different sizes are never identical. Otherwise every pixel
+    channel must be within PIXEL_DIFF_THRESHOLD of its counterpart.
+    """
+    with Image.open(io.BytesIO(source)) as src, Image.open(io.BytesIO(target)) as tgt:
+        if src.size != tgt.size:
+            return False
+        diff = ImageChops.difference(src.convert("RGB"), tgt.convert("RGB"))
+    return max(high for _, high in diff.getextrema()) <= PIXEL_DIFF_THRESHOLD
+
+
+def _save_screenshots(shots: list[bytes], path_prefix: str) -> None:
+    """Write captured screenshots as path_prefix.jpg, or path_prefix_<i>.jpg for tiles."""
+    if len(shots) == 1:
+        names = [f"{path_prefix}.jpg"]
+    else:
+        names = [f"{path_prefix}_{i}.jpg" for i in range(len(shots))]
+    for name, shot in zip(names, shots):
+        with open(name, "wb") as f:
+            f.write(shot)
+
+
+def _needs_probe(route: str) -> bool:
+    """Return True if route's extension suggests it may not be an HTML page.
+
+    >>> _needs_probe("/docs/guide.pdf"), _needs_probe("/about"), _needs_probe("/a.html")
+    (True, False, False)
+    """
+    _, ext = os.path.splitext(route.rsplit("/", 1)[-1])
+    return ext.lower() not in _HTML_EXTENSIONS
 
-    paths = set()
-    for href in hrefs:
-        parsed = urlparse(href)
-        if parsed.netloc and parsed.netloc != base_domain:
+
+def _probe_route(http: httpx.Client, url: str) -> Optional[str]:
+    """Check a URL with an HTTP HEAD before paying for a Chromium render.
+
+    Returns why the route isn't worth rendering (gone, or not an HTML page,
+    e.g. a linked PDF or image), or None to render it. Network errors and
+    servers that refuse HEAD return None so Chromium gets its own try.
+    """
+    try:
+        response = http.head(url)
+    except httpx.HTTPError:
+        return None
+    if response.status_code in (404, 410):
+        return f"HTTP {response.status_code}"
+    if response.is_error:
+        return None
+    content_type = response.headers.get("content-type", "")
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type and "html" not in media_type:
+        return f"not an HTML page ({media_type})"
+    return None
+
+
+def _extract_same_domain_links(
+    page,
+    base_netloc: str,
+    visited: set[str],
+    frontier: deque[str],
+    strip_locale: Optional[Callable[[str], str]] = None,
+) -> None:
+    """Queue the page's unseen same-domain links onto frontier.
+
+    The page itself (see _LINKS_JS) reduces links on base_netloc to
+    de-duplicated paths without query, fragment or trailing slash, so
+    "/about?ref=nav" and "/about#top" are both "/about". Each path then has
+    strip_locale applied, if given. visited holds lowercased paths, so
+    "/About" and "/about" are crawled once, under whichever was found first;
+    unseen paths are added to visited and, with their original case, to
+    frontier.
+    """
+    joined = page.evaluate(_LINKS_JS, base_netloc)
+    for path in joined.split("\n") if joined else ():
+        if strip_locale is not None:
+            path = strip_locale(path)
+        key = path.lower()
+        if key in visited:
             continue
-        path = parsed.path or "/"
-        # Normalize: ensure leading slash, strip trailing slash (except root)
-        if not path.startswith("/"):
-            path = "/" + path
-        if path != "/" and path.endswith("/"):
-            path = path.rstrip("/")
-        paths.add(path)
-    return paths
+        # Share one string between visited and frontier when case allows.
+        visited.add(path if key == path else key)
+        frontier.append(path)
 
 
 # ---------------------------------------------------------------------------
@@ -369,98 +1103,277 @@ def crawl_and_analyze(
     source_locale: str,
     target_locales: list[str],
     max_pages: int = 20,
+    state_file: Optional[str] = None,
+    concurrency: int = CONCURRENCY,
 ) -> tuple[list[dict], int]:
     """Crawl a website across locales and compare screenshots for localization drift.
 
     Uses BFS starting from '/' to discover pages via the source locale, then
-    screenshots each page in every target locale and runs analyze_localization().
+    screenshots each page in every target locale and runs analyze_localization_batch()
+    on all target locales of a route at once. Analysis runs on a thread pool
+    while the browser, launched once per crawl, moves on to the next route.
 
     Args:
         base_url: The site root (e.g. "https://example.com").
         source_locale: The source locale path prefix (e.g. "en").
         target_locales: List of target locale prefixes (e.g. ["fr", "es"]).
         max_pages: Maximum number of routes to crawl.
+        state_file: If set, crawl progress is checkpointed to this JSON file
+            every CHECKPOINT_INTERVAL pages, and an interrupted crawl of the
+            same site and locales resumes from it. Removed once the crawl
+            completes.
+        concurrency: Number of analysis worker threads. Requests in flight
+            are additionally capped process-wide by PRISM_CONCURRENCY, so a
+            larger value only queues more pages. Navigation stays on one
+            thread because Playwright's sync API objects cannot be shared
+            across threads.
 
     Returns:
         A tuple of (issues_list, pages_crawled_count) where issues_list contains
         dicts with keys: route, target_locale, analysis.
     """
     issues: list[dict] = []
-    visited: set[str] = set()
+    # Lowercased routes already queued or crawled; checked once, when a link
+    # is found. queue holds the very same string objects wherever a route is
+    # already lowercase, so each such route is stored once.
+    visited: set[str] = {"/"}
     queue: deque[str] = deque(["/"])
     pages_crawled = 0
-    screenshot_dir = tempfile.mkdtemp(prefix="prism_")
-
-    print(f"Screenshots will be saved to: {screenshot_dir}")
-
-    with sync_playwright() as pw:
+    pending: list[tuple[str, list[tuple[str, Optional[str]]], Future]] = []
+    # Pages often link to their counterparts in other locales ("/fr/about");
+    # those are the same route as "/en/about" and must not be queued again.
+    locales = [source_locale, *target_locales]
+    strip_locale = _make_locale_stripper(*locales)
+    base_netloc, _ = _parse_base(base_url)
+    build_url = _make_url_builder(base_url)
+    crawl_id = {"base_url": base_url, "locales": locales}
+
+    state = _load_crawl_state(state_file, crawl_id) if state_file else None
+    # Only a checkpoint this crawl resumed from or wrote is removed at the
+    # end; a rejected file may belong to another crawl.
+    owns_state_file = state is not None
+    if state is not None:
+        issues = state["issues"]
+        # JSON decoding gives queued routes a second copy; share visited's.
+        canonical = {path: path for path in state["visited"]}
+        queue = deque(canonical.get(path, path) for path in state["queue"])
+        visited = set(canonical).union(path.lower() for path in queue)
+        pages_crawled = state["pages_crawled"]
+        print(f"Resuming crawl from {state_file} ({pages_crawled} pages done)")
+    last_checkpoint = pages_crawled
+
+    if SCREENSHOT_DIR:
+        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+        print(f"Screenshots will be saved to: {SCREENSHOT_DIR}")
+
+    with (
+        _analysis_pool(concurrency) as executor,
+        httpx.Client(follow_redirects=True, timeout=5) as http,
+        sync_playwright() as pw,
+    ):
         browser = pw.chromium.launch()
-        page = browser.new_page()
+        # One long-lived context per locale so cookies and storage (e.g. a
+        # remembered language preference) never leak between locales, while
+        # Chromium keeps its connections to the origin warm across routes.
+        # Each route gets a fresh page, closed as soon as it is captured.
+        contexts = {locale: browser.new_context() for locale in locales}
 
         while queue and pages_crawled < max_pages:
+            if state_file and pages_crawled - last_checkpoint >= CHECKPOINT_INTERVAL:
+                # Wait for outstanding analyses so the checkpoint never
+                # records a crawled route whose results are still in flight.
+                _collect_crawl_results(pending, issues)
+                _save_crawl_state(state_file, {
+                    **crawl_id,
+                    "issues": issues,
+                    "visited": sorted(visited),
+                    "queue": list(queue),
+                    "pages_crawled": pages_crawled,
+                })
+                owns_state_file = True
+                last_checkpoint = pages_crawled
+
             route = queue.popleft()
-            if route in visited:
-                continue
-            visited.add(route)
             pages_crawled += 1
 
             # --- Source locale screenshot ---
-            source_url = _build_locale_url(base_url, source_locale, route)
+            source_url = build_url(source_locale, route)
             safe_name = _safe_filename(route)
-            source_screenshot = os.path.join(
-                screenshot_dir, f"{safe_name}_{source_locale}.png"
-            )
 
             print(f"\n[{pages_crawled}/{max_pages}] Crawling route: {route}")
             print(f"  Source: {source_url}")
 
-            try:
-                page.goto(source_url, wait_until="networkidle", timeout=30000)
-                page.screenshot(path=source_screenshot, full_page=True)
-            except Exception as exc:
-                print(f"  SKIP (source failed): {exc}")
+            skip_reason = None
+            if HTTP_PROBE and _needs_probe(route):
+                skip_reason = _probe_route(http, source_url)
+            if skip_reason:
+                print(f"  SKIP (source {skip_reason})")
                 continue
 
-            # --- Discover links from source page ---
-            raw_links = _extract_same_domain_links(page, base_url)
-            for link_path in raw_links:
-                normalized = _strip_locale_prefix(link_path, source_locale)
-                if normalized not in visited:
-                    queue.append(normalized)
+            with closing(contexts[source_locale].new_page()) as source_page:
+                try:
+                    _load_page(source_page, source_url)
+                    source_shots = _capture(source_page)
+                except Exception as exc:
+                    print(f"  SKIP (source failed): {exc}")
+                    continue
 
-            # --- Target locale screenshots + analysis ---
-            for target_locale in target_locales:
-                target_url = _build_locale_url(base_url, target_locale, route)
-                target_screenshot = os.path.join(
-                    screenshot_dir, f"{safe_name}_{target_locale}.png"
+                # --- Discover links from source page ---
+                # A client-side redirect may still be replacing the page, and
+                # its links are then out of reach; the capture is still good.
+                try:
+                    _extract_same_domain_links(
+                        source_page, base_netloc, visited, queue, strip_locale
+                    )
+                except Exception as exc:
+                    print(f"  Link discovery failed: {exc}")
+
+            if SCREENSHOT_DIR:
+                _save_screenshots(
+                    source_shots,
+                    os.path.join(SCREENSHOT_DIR, f"{safe_name}_{source_locale}"),
                 )
 
+            # --- Target locale screenshots ---
+            # (target_locale, tile_label, source_jpeg, target_jpeg)
+            captured: list[tuple[str, Optional[str], bytes, bytes]] = []
+            # (target_locale, tile_label) of pairs identical to the source
+            untranslated: list[tuple[str, Optional[str]]] = []
+            for target_locale in target_locales:
+                target_url = build_url(target_locale, route)
+
                 print(f"  Target ({target_locale}): {target_url}")
 
                 try:
-                    page.goto(target_url, wait_until="networkidle", timeout=30000)
-                    page.screenshot(path=target_screenshot, full_page=True)
+                    with closing(contexts[target_locale].new_page()) as target_page:
+                        _load_page(target_page, target_url)
+                        target_shots = _capture(target_page)
                 except Exception as exc:
                     print(f"  SKIP (target {target_locale} failed): {exc}")
                     continue
 
-                analysis = analyze_localization(source_screenshot, target_screenshot)
-
-                if "no localization issues" not in analysis.lower():
-                    issues.append({
-                        "route": route,
-                        "target_locale": target_locale,
-                        "analysis": analysis,
-                    })
-                    print(f"  Issues found for {target_locale}!")
-                else:
-                    print(f"  No issues for {target_locale}")
+                if SCREENSHOT_DIR:
+                    _save_screenshots(
+                        target_shots,
+                        os.path.join(SCREENSHOT_DIR, f"{safe_name}_{target_locale}"),
+                    )
+
+                # Tiles are paired by scroll position; a tile only one side
+                # has is left unanalyzed.
+                tile_count = min(len(source_shots), len(target_shots))
+                if len(source_shots) != len(target_shots):
+                    print(
+                        f"  Page lengths differ ({len(source_shots)} source vs "
+                        f"{len(target_shots)} target tiles); comparing the "
+                        f"first {tile_count} only"
+                    )
+                identical = 0
+                for i in range(tile_count):
+                    label = f"Tile {i + 1}/{tile_count}" if tile_count > 1 else None
+                    # A render identical to the source was never translated;
+                    # report it without spending a model call.
+                    if _visually_identical(source_shots[i], target_shots[i]):
+                        identical += 1
+                        untranslated.append((target_locale, label))
+                        continue
+                    captured.append((target_locale, label, source_shots[i], target_shots[i]))
+                if identical:
+                    print(f"  {identical} screenshot(s) identical to source, likely untranslated")
+
+            if untranslated:
+                done: Future = Future()
+                done.set_result([UNTRANSLATED_TEXT] * len(untranslated))
+                pending.append((route, untranslated, done))
+
+            # --- Analysis, batched across target locales ---
+            # Playwright's sync API is bound to this thread, so only the
+            # Gemini calls go to the pool.
+            # Only the labels are kept in pending so screenshot bytes are
+            # released as soon as their analysis has run.
+            for chunk in _chunked(captured, BATCH_SIZE):
+                future = executor.submit(analyze_localization_batch, [
+                    (source_jpeg, target_jpeg)
+                    for _, _, source_jpeg, target_jpeg in chunk
+                ])
+                labels = [(locale, label) for locale, label, _, _ in chunk]
+                pending.append((route, labels, future))
 
         browser.close()
 
+        if pending:
+            print("\nWaiting for analysis results...")
+        _collect_crawl_results(pending, issues)
+
+    if owns_state_file and os.path.exists(state_file):
+        os.remove(state_file)
+
     return issues, pages_crawled
 
 
+def _collect_crawl_results(
+    pending: list[tuple[str, list[tuple[str, Optional[str]]], Future]],
+    issues: list[dict],
+) -> None:
+    """Wait for queued route analyses, appending issues in submission order.
+
+    Empties ``pending``.
+    """
+    for route, chunk, future in pending:
+        for (target_locale, label), analysis in zip(chunk, future.result()):
+            where = f"{target_locale} ({label})" if label else target_locale
+            if analysis != NO_ISSUES_TEXT:
+                issues.append({
+                    "route": route,
+                    "target_locale": target_locale,
+                    "analysis": f"{label}:\n{analysis}" if label else analysis,
+                })
+                print(f"  [{route}] Issues found for {where}!")
+            else:
+                print(f"  [{route}] No issues for {where}")
+    pending.clear()
+
+
+def _load_crawl_state(state_file: str, crawl_id: dict) -> Optional[dict]:
+    """Load a crawl checkpoint, or None if absent or from a different crawl."""
+    try:
+        with open(state_file, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        print(f"Ignoring unreadable crawl state {state_file}: {exc}")
+        return None
+
+    if not _valid_crawl_state(state):
+        print(f"Ignoring unreadable crawl state {state_file}: unexpected contents")
+        return None
+    if any(state.get(key) != value for key, value in crawl_id.items()):
+        print(f"Ignoring crawl state {state_file}: it belongs to a different crawl")
+        return None
+    return state
+
+
+def _valid_crawl_state(state) -> bool:
+    """Return True if a decoded checkpoint has the shape _save_crawl_state writes."""
+    return (
+        isinstance(state, dict)
+        and isinstance(state.get("issues"), list)
+        and all(isinstance(issue, dict) for issue in state["issues"])
+        and isinstance(state.get("visited"), list)
+        and isinstance(state.get("queue"), list)
+        and all(isinstance(path, str) for path in state["visited"] + state["queue"])
+        and isinstance(state.get("pages_crawled"), int)
+    )
+
+
+def _save_crawl_state(state_file: str, state: dict) -> None:
+    """Atomically write a crawl checkpoint."""
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_file)
+
+
 # ---------------------------------------------------------------------------
 # Report
 # ---------------------------------------------------------------------------
@@ -472,14 +1385,17 @@ def _print_ftl_report(issues: list[dict]) -> None:
     print("FTL LOCALIZATION DRIFT REPORT")
     print("=" * 60)
     print(f"Issues found: {len(issues)}")
+    _print_cache_stats()
 
     if not issues:
         print("\nNo localization issues detected across any devices.")
         return
 
-    by_device: dict[str, list[dict]] = {}
+    # defaultdict keeps first-seen order without building a throwaway list
+    # per issue the way setdefault(key, []) does.
+    by_device: defaultdict[str, list[dict]] = defaultdict(list)
     for issue in issues:
-        by_device.setdefault(issue["device"], []).append(issue)
+        by_device[issue["device"]].append(issue)
 
     for device, device_issues in by_device.items():
         print(f"\n--- Device: {device} ---")
@@ -493,78 +1409,119 @@ def _print_ftl_report(issues: list[dict]) -> None:
 
 
 def _print_report(issues: list[dict], pages_crawled: int) -> None:
-    """Print a summary report of all localization issues found."""
-    print("\n" + "=" * 60)
-    print("LOCALIZATION DRIFT REPORT")
-    print("=" * 60)
-    print(f"Pages crawled: {pages_crawled}")
-    print(f"Issues found: {len(issues)}")
+    """Print a summary report of all localization issues found.
+
+    The report is assembled in memory and written with a single call so
+    large reports don't pay for one stdout write per line.
+    """
+    buf = [
+        "",
+        "=" * 60,
+        "LOCALIZATION DRIFT REPORT",
+        "=" * 60,
+        f"Pages crawled: {pages_crawled}",
+        f"Issues found: {len(issues)}",
+    ]
+    summary = _cache_stats_summary()
+    if summary:
+        buf.append(summary)
 
     if not issues:
-        print("\nNo localization issues detected across any pages.")
+        buf.append("\nNo localization issues detected across any pages.")
+        sys.stdout.write("\n".join(buf) + "\n")
         return
 
     # Group by route
-    by_route: dict[str, list[dict]] = {}
+    by_route: defaultdict[str, list[dict]] = defaultdict(list)
     for issue in issues:
-        by_route.setdefault(issue["route"], []).append(issue)
+        by_route[issue["route"]].append(issue)
 
     for route, route_issues in by_route.items():
-        print(f"\n--- Route: {route} ---")
+        buf.append(f"\n--- Route: {route} ---")
         for issue in route_issues:
-            print(f"\n  Locale: {issue['target_locale']}")
-            for line in issue["analysis"].strip().splitlines():
-                print(f"    {line}")
+            buf.append(f"\n  Locale: {issue['target_locale']}")
+            buf.extend(
+                f"    {line}" for line in issue["analysis"].strip().splitlines()
+            )
 
-    print("\n" + "=" * 60)
+    buf.append("\n" + "=" * 60)
+    sys.stdout.write("\n".join(buf) + "\n")
 
 
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
+def main(argv: list[str]) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv: Command line arguments, without the program name.
+
+    Returns:
+        The process exit code.
+    """
+    if not argv:
         print("Usage:")
         print("  python main.py analyze <source_image> <target_image>")
         print("  python main.py crawl <base_url> <source_locale> <target_locale> [target_locale...]")
         print("  python main.py ftl-analyze <screenshots_dir> <source_locale> <target_locale> [target_locale...]")
-        sys.exit(1)
+        return 1
 
-    command = sys.argv[1]
+    command = argv[0]
 
     if command == "analyze":
-        if len(sys.argv) < 4:
+        if len(argv) < 3:
             print("Usage: python main.py analyze <source_image> <target_image>")
-            sys.exit(1)
-        result = analyze_localization(sys.argv[2], sys.argv[3])
+            return 1
+        result = analyze_localization(argv[1], argv[2])
         print(result)
 
     elif command == "crawl":
-        if len(sys.argv) < 5:
+        if len(argv) < 4:
             print("Usage: python main.py crawl <base_url> <source_locale> <target_locale> [target_locale...]")
-            sys.exit(1)
-        crawl_base_url = sys.argv[2]
-        crawl_source_locale = sys.argv[3]
-        crawl_target_locales = sys.argv[4:]
+            return 1
         found_issues, total_pages = crawl_and_analyze(
-            crawl_base_url, crawl_source_locale, crawl_target_locales
+            argv[1],
+            argv[2],
+            argv[3:],
+            state_file=os.environ.get("PRISM_CRAWL_STATE"),
         )
         _print_report(found_issues, total_pages)
 
     elif command == "ftl-analyze":
-        if len(sys.argv) < 5:
+        if len(argv) < 4:
             print("Usage: python main.py ftl-analyze <screenshots_dir> <source_locale> <target_locale> [target_locale...]")
-            sys.exit(1)
-        ftl_screenshots_dir = sys.argv[2]
-        ftl_source_locale = sys.argv[3]
-        ftl_target_locales = sys.argv[4:]
-        found_issues = ftl_analyze(
-            ftl_screenshots_dir, ftl_source_locale, ftl_target_locales
-        )
+            return 1
+        screenshots_dir = argv[1]
+        if not os.path.isdir(screenshots_dir):
+            print(f"Screenshots directory not found: {screenshots_dir}")
+            return 1
+        issues_path = os.path.join(screenshots_dir, "issues.jsonl")
+        try:
+            issues_file = open(issues_path, "w", encoding="utf-8")
+        except OSError as exc:
+            # e.g. a read-only results directory; the report still prints.
+            print(f"Cannot write {issues_path} ({exc}); issues will only be printed")
+            issues_file = None
+        else:
+            print(f"Issues will be streamed to: {issues_path}")
+        with issues_file or nullcontext():
+            found_issues = ftl_analyze(
+                screenshots_dir,
+                argv[2],
+                argv[3:],
+                sink=_jsonl_sink(issues_file),
+            )
         _print_ftl_report(found_issues)
 
     else:
         print(f"Unknown command: {command}")
         print("Available commands: analyze, crawl, ftl-analyze")
-        sys.exit(1)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,22 +1,132 @@
+import io
+import json
+import os
+import shutil
 import subprocess
-import sys
 import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import Callable
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from PIL import Image
 
+import main
 from main import (
     _build_locale_url,
+    _cache_get,
+    _cache_key,
+    _cache_put,
     _extract_same_domain_links,
+    _make_locale_stripper,
     _print_report,
     _safe_filename,
+    _parse_batch_response,
     _strip_locale_prefix,
     analyze_localization,
+    analyze_localization_batch,
     crawl_and_analyze,
+    ftl_analyze,
 )
 
 
+@pytest.fixture(autouse=True)
+def _disable_llm_cache(monkeypatch):
+    """Keep tests away from the user's on-disk LLM cache."""
+    monkeypatch.setenv("PRISM_CACHE_DISABLE", "1")
+
+
+def _jpeg(width, height, color="white"):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class FakePage:
+    """Plain-Python stand-in for a Playwright page, far cheaper than MagicMock.
+
+    goto() records every URL and raises for those in fail_urls; evaluate()
+    answers link extraction with link_fn(), newline-joined like _LINKS_JS.
+    """
+
+    def __init__(self):
+        self.link_fn: Callable[[], list[str]] = lambda: []
+        self.fail_urls: set[str] = set()
+        self.urls: list[str] = []
+        self.closed = 0
+
+    def goto(self, url, **kwargs):
+        self.urls.append(url)
+        if url in self.fail_urls:
+            raise Exception(f"net::ERR_CONNECTION_REFUSED at {url}")
+
+    def wait_for_load_state(self, state, **kwargs):
+        pass
+
+    def screenshot(self, **kwargs):
+        return _jpeg(4, 4)
+
+    def evaluate(self, js, *args):
+        return "\n".join(self.link_fn())
+
+    def close(self):
+        self.closed += 1
+
+
+class FakeBrowser:
+    """Launched browser whose every locale context hands out the same FakePage."""
+
+    def __init__(self):
+        self.page = FakePage()
+        self.launches = 0
+        self.contexts = 0
+        self.pages_opened = 0
+
+    def launch(self):
+        self.launches += 1
+        return self
+
+    def new_context(self):
+        self.contexts += 1
+        return self
+
+    def new_page(self):
+        self.pages_opened += 1
+        return self.page
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_browser(monkeypatch):
+    """Patch main.sync_playwright() to hand out a FakeBrowser.
+
+    The HTTP probe is stubbed to render every route, so crawls stay offline,
+    and every screenshot pair counts as different so it reaches the model.
+    """
+    browser = FakeBrowser()
+    pw = SimpleNamespace(chromium=SimpleNamespace(launch=browser.launch))
+    monkeypatch.setattr(main, "sync_playwright", lambda: nullcontext(pw))
+    monkeypatch.setattr(main, "_probe_route", lambda http, url: None)
+    monkeypatch.setattr(main, "_visually_identical", lambda source, target: False)
+    return browser
+
+
+@pytest.fixture(autouse=True)
+def _reset_genai_client():
+    """Make every test build its own (usually mocked) Gemini client."""
+    main._get_genai_client.cache_clear()
+    yield
+    main._get_genai_client.cache_clear()
+
+
 # ---------------------------------------------------------------------------
 # _strip_locale_prefix
 # ---------------------------------------------------------------------------
@@ -46,6 +156,22 @@ class TestStripLocalePrefix:
         assert _strip_locale_prefix("/english/about", "en") == "/english/about"
 
 
+class TestMakeLocaleStripper:
+    def test_reused_across_paths(self):
+        strip = _make_locale_stripper("en", "fr")
+        assert strip("/en/about") == "/about"
+        assert strip("/fr") == "/"
+        assert strip("/de/about") == "/de/about"
+
+    def test_strips_any_given_locale(self):
+        strip = _make_locale_stripper("en", "fr")
+        assert strip("/fr/about") == "/about"
+        assert strip("/en") == "/"
+
+    def test_prefix_must_end_at_segment(self):
+        assert _make_locale_stripper("en")("/english/about") == "/english/about"
+
+
 # ---------------------------------------------------------------------------
 # _build_locale_url
 # ---------------------------------------------------------------------------
@@ -77,6 +203,14 @@ class TestBuildLocaleUrl:
         )
 
 
+class TestParseBase:
+    def test_splits_netloc_and_strips_slash(self):
+        assert main._parse_base("https://example.com/") == ("example.com", "https://example.com")
+
+    def test_keeps_port(self):
+        assert main._parse_base("http://localhost:3000")[0] == "localhost:3000"
+
+
 # ---------------------------------------------------------------------------
 # _safe_filename
 # ---------------------------------------------------------------------------
@@ -98,44 +232,179 @@ class TestSafeFilename:
     def test_empty_string(self):
         assert _safe_filename("") == "index"
 
+    def test_keeps_edge_underscores(self):
+        assert _safe_filename("/_next/data/") == "_next_data"
+
 
 # ---------------------------------------------------------------------------
 # _extract_same_domain_links
 # ---------------------------------------------------------------------------
 
 
+def _links(paths, visited=None, strip_locale=None):
+    mock_page = MagicMock()
+    mock_page.evaluate.return_value = "\n".join(paths)
+    visited = set() if visited is None else visited
+    frontier = deque()
+    _extract_same_domain_links(
+        mock_page, "example.com", visited, frontier, strip_locale
+    )
+    return list(frontier)
+
+
 class TestExtractSameDomainLinks:
-    def test_filters_external_links(self):
+    def test_filters_in_page_by_host(self):
         mock_page = MagicMock()
-        mock_page.eval_on_selector_all.return_value = [
+        mock_page.evaluate.return_value = "/en/about\n/en/contact"
+        frontier = deque()
+        _extract_same_domain_links(mock_page, "example.com:8080", set(), frontier)
+        assert mock_page.evaluate.call_args.args == (main._LINKS_JS, "example.com:8080")
+        assert list(frontier) == ["/en/about", "/en/contact"]
+
+    def test_empty_page(self):
+        assert _links([]) == []
+
+    def test_skips_visited_links(self):
+        visited = {"/about"}
+        result = _links(["/about", "/pricing"], visited=visited)
+        assert result == ["/pricing"]
+        assert visited == {"/about", "/pricing"}
+
+    def test_applies_strip_locale_before_dedupe(self):
+        result = _links(
+            ["/en/about", "/es/about", "/es"],
+            strip_locale=_make_locale_stripper("en", "es"),
+        )
+        assert result == ["/about", "/"]
+
+    def test_case_variants_are_one_route(self):
+        visited = set()
+        result = _links(["/Docs/API", "/docs/api", "/about", "/About"], visited=visited)
+        assert result == ["/Docs/API", "/about"]
+        assert visited == {"/docs/api", "/about"}
+
+    def test_frontier_shares_visited_strings(self):
+        visited = set()
+        result = _links(["/docs/api"], visited=visited)
+        assert next(iter(visited)) is result[0]
+
+
+def _run_links_js(hrefs, host="example.com"):
+    """Evaluate _LINKS_JS in node against a stub document holding hrefs."""
+    script = (
+        f"const hrefs = {json.dumps(hrefs)};\n"
+        "globalThis.document = {querySelectorAll: () => hrefs.map(href => ({href}))};\n"
+        f"process.stdout.write(({main._LINKS_JS})({json.dumps(host)}));\n"
+    )
+    result = subprocess.run(
+        ["node", "-e", script], capture_output=True, text=True, check=True, timeout=30
+    )
+    return result.stdout.split("\n") if result.stdout else []
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+class TestLinksJS:
+    def test_filters_external_links(self):
+        assert _run_links_js([
             "https://example.com/en/about",
             "https://other.com/page",
             "https://example.com/en/contact",
-        ]
-        result = _extract_same_domain_links(mock_page, "https://example.com")
-        assert result == {"/en/about", "/en/contact"}
+        ]) == ["/en/about", "/en/contact"]
 
     def test_strips_trailing_slash(self):
+        assert _run_links_js(["https://example.com/en/about/"]) == ["/en/about"]
+
+    def test_bare_host_is_root(self):
+        assert _run_links_js(["https://example.com", "https://example.com/"]) == ["/"]
+
+    def test_skips_non_http_links(self):
+        assert _run_links_js(["mailto:team@example.com", "javascript:void(0)"]) == []
+
+    def test_query_fragment_and_case_variants_are_one_route(self):
+        paths = _run_links_js([
+            "https://example.com/about?ref=nav",
+            "https://example.com/About#top",
+        ])
+        assert paths == ["/about", "/About"]
+        assert _links(paths) == ["/about"]
+
+    def test_host_includes_port(self):
+        hrefs = ["http://localhost:3000/about", "http://localhost:4000/other"]
+        assert _run_links_js(hrefs, host="localhost:3000") == ["/about"]
+
+
+# ---------------------------------------------------------------------------
+# _load_page
+# ---------------------------------------------------------------------------
+
+
+class TestLoadPage:
+    def test_waits_for_dom_then_load(self):
         mock_page = MagicMock()
-        mock_page.eval_on_selector_all.return_value = [
-            "https://example.com/en/about/",
-        ]
-        result = _extract_same_domain_links(mock_page, "https://example.com")
-        assert result == {"/en/about"}
+        main._load_page(mock_page, "https://example.com/en/")
+        assert mock_page.goto.call_args.kwargs["wait_until"] == "domcontentloaded"
+        mock_page.wait_for_load_state.assert_called_once_with("load", timeout=5000)
 
-    def test_preserves_root(self):
+    def test_load_timeout_is_not_fatal(self):
         mock_page = MagicMock()
-        mock_page.eval_on_selector_all.return_value = [
-            "https://example.com/",
-        ]
-        result = _extract_same_domain_links(mock_page, "https://example.com")
-        assert result == {"/"}
+        mock_page.wait_for_load_state.side_effect = main.PlaywrightTimeoutError("slow")
+        main._load_page(mock_page, "https://example.com/en/")
 
-    def test_empty_page(self):
+
+# ---------------------------------------------------------------------------
+# _capture
+# ---------------------------------------------------------------------------
+
+
+class TestCapture:
+    def test_full_page_by_default(self):
+        mock_page = MagicMock()
+        mock_page.screenshot.return_value = shot = _jpeg(1280, 2048)
+        assert main._capture(mock_page) == [shot]
+        mock_page.screenshot.assert_called_once_with(type="jpeg", quality=85, full_page=True)
+
+    def test_tall_full_page_stays_one_screenshot(self):
+        mock_page = MagicMock()
+        mock_page.screenshot.return_value = shot = _jpeg(1280, 5000)
+        assert main._capture(mock_page) == [shot]
+
+    def test_viewport_mode(self, monkeypatch):
+        monkeypatch.setattr(main, "CAPTURE_MODE", "viewport")
+        mock_page = MagicMock()
+        mock_page.screenshot.return_value = b"jpeg"
+        assert main._capture(mock_page) == [b"jpeg"]
+        mock_page.screenshot.assert_called_once_with(type="jpeg", quality=85, full_page=False)
+
+    def test_tiled_mode_scrolls_one_viewport_per_tile(self, monkeypatch):
+        monkeypatch.setattr(main, "CAPTURE_MODE", "tiled")
+        mock_page = MagicMock()
+        mock_page.viewport_size = {"width": 400, "height": 800}
+        mock_page.evaluate.side_effect = lambda js, *args: 2000 if not args else None
+        mock_page.screenshot.side_effect = [b"t0", b"t1", b"t2"]
+
+        assert main._capture(mock_page) == [b"t0", b"t1", b"t2"]
+        scrolls = [c.args[1] for c in mock_page.evaluate.call_args_list if len(c.args) > 1]
+        assert scrolls == [0, 800, 1600]
+
+    def test_tiled_mode_reports_truncation(self, monkeypatch, capsys):
+        monkeypatch.setattr(main, "CAPTURE_MODE", "tiled")
+        monkeypatch.setattr(main, "MAX_TILES", 2)
         mock_page = MagicMock()
-        mock_page.eval_on_selector_all.return_value = []
-        result = _extract_same_domain_links(mock_page, "https://example.com")
-        assert result == set()
+        mock_page.viewport_size = {"width": 400, "height": 800}
+        mock_page.evaluate.side_effect = lambda js, *args: 2000 if not args else None
+
+        assert len(main._capture(mock_page)) == 2
+        assert "only the top 1600px (2 tiles)" in capsys.readouterr().out
+
+
+class TestSaveScreenshots:
+    def test_single_shot(self, tmp_path):
+        main._save_screenshots([b"jpeg"], str(tmp_path / "index_en"))
+        assert (tmp_path / "index_en.jpg").read_bytes() == b"jpeg"
+
+    def test_tiles_are_numbered(self, tmp_path):
+        main._save_screenshots([b"t0", b"t1"], str(tmp_path / "index_en"))
+        assert sorted(os.listdir(tmp_path)) == ["index_en_0.jpg", "index_en_1.jpg"]
 
 
 # ---------------------------------------------------------------------------
@@ -144,34 +413,25 @@ class TestExtractSameDomainLinks:
 
 
 class TestCrawlAndAnalyze:
-    @patch("main.sync_playwright")
-    @patch("main.analyze_localization")
-    def test_crawls_homepage_and_discovered_links(
-        self, mock_analyze, mock_pw_ctx
-    ):
+    @patch("main.analyze_localization_batch")
+    def test_crawls_homepage_and_discovered_links(self, mock_analyze, fake_browser):
         """BFS discovers /about from homepage, visits both routes."""
-        mock_analyze.return_value = "No localization issues detected."
-
-        # Set up Playwright mocks
-        mock_page = MagicMock()
-        mock_browser = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_pw = MagicMock()
-        mock_pw.chromium.launch.return_value = mock_browser
-        mock_pw_ctx.return_value.__enter__ = MagicMock(return_value=mock_pw)
-        mock_pw_ctx.return_value.__exit__ = MagicMock(return_value=False)
+        mock_analyze.side_effect = lambda pairs: [
+            "No localization issues detected."
+        ] * len(pairs)
 
         # Homepage links include /en/about; /about page has no new links
         call_count = 0
 
-        def fake_links(*args, **kwargs):
+        def fake_links():
             nonlocal call_count
             call_count += 1
             if call_count == 1:  # homepage source
-                return ["https://example.com/en/about"]
+                # /fr/about is the same route in another locale
+                return ["/en/about", "/fr/about"]
             return []  # all other pages
 
-        mock_page.eval_on_selector_all.side_effect = fake_links
+        fake_browser.page.link_fn = fake_links
 
         issues, pages_crawled = crawl_and_analyze(
             "https://example.com", "en", ["fr"], max_pages=10
@@ -179,25 +439,13 @@ class TestCrawlAndAnalyze:
 
         assert pages_crawled == 2  # / and /about
         assert issues == []
-        # analyze_localization called once per route per target locale
+        # One batch per route, one pair per target locale
         assert mock_analyze.call_count == 2
+        assert all(len(c.args[0]) == 1 for c in mock_analyze.call_args_list)
 
-    @patch("main.sync_playwright")
-    @patch("main.analyze_localization")
-    def test_collects_issues_when_drift_detected(
-        self, mock_analyze, mock_pw_ctx
-    ):
-        mock_analyze.return_value = "- Header: text truncated → increase max-width"
-
-        mock_page = MagicMock()
-        mock_browser = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_pw = MagicMock()
-        mock_pw.chromium.launch.return_value = mock_browser
-        mock_pw_ctx.return_value.__enter__ = MagicMock(return_value=mock_pw)
-        mock_pw_ctx.return_value.__exit__ = MagicMock(return_value=False)
-
-        mock_page.eval_on_selector_all.return_value = []
+    @patch("main.analyze_localization_batch")
+    def test_collects_issues_when_drift_detected(self, mock_analyze, fake_browser):
+        mock_analyze.return_value = ["- Header: text truncated → increase max-width"]
 
         issues, pages_crawled = crawl_and_analyze(
             "https://example.com", "en", ["fr"], max_pages=5
@@ -209,49 +457,60 @@ class TestCrawlAndAnalyze:
         assert issues[0]["target_locale"] == "fr"
         assert "truncated" in issues[0]["analysis"]
 
-    @patch("main.sync_playwright")
-    @patch("main.analyze_localization")
-    def test_respects_max_pages(self, mock_analyze, mock_pw_ctx):
-        mock_analyze.return_value = "No localization issues detected."
+    @patch("main.analyze_localization_batch")
+    def test_link_discovery_failure_keeps_crawling(self, mock_analyze, fake_browser, capsys):
+        mock_analyze.side_effect = lambda pairs: ["- Header: truncated"] * len(pairs)
 
-        mock_page = MagicMock()
-        mock_browser = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_pw = MagicMock()
-        mock_pw.chromium.launch.return_value = mock_browser
-        mock_pw_ctx.return_value.__enter__ = MagicMock(return_value=mock_pw)
-        mock_pw_ctx.return_value.__exit__ = MagicMock(return_value=False)
+        def navigating_away():
+            raise Exception("Execution context was destroyed, most likely because of a navigation")
+
+        fake_browser.page.link_fn = navigating_away
+
+        issues, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr"], max_pages=5
+        )
+
+        assert pages_crawled == 1
+        assert [issue["route"] for issue in issues] == ["/"]
+        assert "Link discovery failed: Execution context was destroyed" in capsys.readouterr().out
+
+    @patch("main.analyze_localization_batch")
+    def test_issue_mentioning_no_issues_is_kept(self, mock_analyze, fake_browser):
+        analysis = "- Banner: text truncated; rest of screen has no localization issues → widen"
+        mock_analyze.return_value = [analysis]
+
+        issues, _ = crawl_and_analyze("https://example.com", "en", ["fr"], max_pages=1)
+
+        assert [issue["analysis"] for issue in issues] == [analysis]
+
+    @patch("main.analyze_localization_batch")
+    def test_respects_max_pages(self, mock_analyze, fake_browser):
+        mock_analyze.return_value = ["No localization issues detected."]
 
         # Every page returns 3 new links — without max_pages this would explode
         counter = {"val": 0}
 
-        def infinite_links(*args, **kwargs):
+        def infinite_links():
             counter["val"] += 1
             n = counter["val"]
-            return [f"https://example.com/en/page{n}_{i}" for i in range(3)]
+            return [f"/en/page{n}_{i}" for i in range(3)]
 
-        mock_page.eval_on_selector_all.side_effect = infinite_links
+        fake_browser.page.link_fn = infinite_links
 
         issues, pages_crawled = crawl_and_analyze(
             "https://example.com", "en", ["fr"], max_pages=3
         )
 
         assert pages_crawled == 3
+        # One context per locale, one page per (route, locale), each closed
+        assert fake_browser.contexts == 2
+        assert fake_browser.pages_opened == 6
+        assert fake_browser.page.closed == 6
 
-    @patch("main.sync_playwright")
-    @patch("main.analyze_localization")
-    def test_skips_page_on_navigation_error(self, mock_analyze, mock_pw_ctx):
-        mock_page = MagicMock()
-        mock_browser = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_pw = MagicMock()
-        mock_pw.chromium.launch.return_value = mock_browser
-        mock_pw_ctx.return_value.__enter__ = MagicMock(return_value=mock_pw)
-        mock_pw_ctx.return_value.__exit__ = MagicMock(return_value=False)
-
+    @patch("main.analyze_localization_batch")
+    def test_skips_page_on_navigation_error(self, mock_analyze, fake_browser):
         # Source page.goto raises an error
-        mock_page.goto.side_effect = Exception("net::ERR_CONNECTION_REFUSED")
-        mock_page.eval_on_selector_all.return_value = []
+        fake_browser.page.fail_urls = {"https://example.com/en/"}
 
         issues, pages_crawled = crawl_and_analyze(
             "https://example.com", "en", ["fr"], max_pages=5
@@ -262,28 +521,263 @@ class TestCrawlAndAnalyze:
         # analyze_localization should never be called since source failed
         mock_analyze.assert_not_called()
 
-    @patch("main.sync_playwright")
-    @patch("main.analyze_localization")
-    def test_multiple_target_locales(self, mock_analyze, mock_pw_ctx):
-        mock_analyze.return_value = "No localization issues detected."
+    @patch("main.analyze_localization_batch")
+    def test_multiple_target_locales(self, mock_analyze, fake_browser):
+        mock_analyze.return_value = ["No localization issues detected."] * 3
 
-        mock_page = MagicMock()
-        mock_browser = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_pw = MagicMock()
-        mock_pw.chromium.launch.return_value = mock_browser
-        mock_pw_ctx.return_value.__enter__ = MagicMock(return_value=mock_pw)
-        mock_pw_ctx.return_value.__exit__ = MagicMock(return_value=False)
+        issues, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr", "es", "de"], max_pages=1, concurrency=2
+        )
+
+        assert pages_crawled == 1
+        # All target locales of a route go out in a single batch
+        assert mock_analyze.call_count == 1
+        assert len(mock_analyze.call_args.args[0]) == 3
+        # One browser launch, one isolated context per locale
+        assert fake_browser.launches == 1
+        assert fake_browser.contexts == 4
+
+    @patch("main.analyze_localization_batch")
+    def test_skips_routes_rejected_by_http_probe(
+        self, mock_analyze, fake_browser, monkeypatch
+    ):
+        mock_analyze.return_value = ["No localization issues detected."]
+        fake_browser.page.link_fn = lambda: ["/en/guide.pdf", "/en/about"]
+
+        probed = []
 
-        mock_page.eval_on_selector_all.return_value = []
+        def probe(http, url):
+            probed.append(url)
+            return "not an HTML page (application/pdf)"
+
+        monkeypatch.setattr(main, "_probe_route", probe)
+
+        _, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr"], max_pages=5
+        )
+
+        # Only the file-like route is probed; page routes go straight to Chromium
+        assert probed == ["https://example.com/en/guide.pdf"]
+        assert pages_crawled == 3
+        assert "https://example.com/en/guide.pdf" not in fake_browser.page.urls
+        assert mock_analyze.call_count == 2
+
+    @patch("main.analyze_localization_batch")
+    def test_identical_screenshots_reported_untranslated(
+        self, mock_analyze, fake_browser, monkeypatch
+    ):
+        monkeypatch.setattr(main, "_visually_identical", lambda source, target: True)
 
         issues, pages_crawled = crawl_and_analyze(
-            "https://example.com", "en", ["fr", "es", "de"], max_pages=1
+            "https://example.com", "en", ["fr"], max_pages=1
         )
 
         assert pages_crawled == 1
-        # One analysis per target locale
-        assert mock_analyze.call_count == 3
+        assert issues == [{
+            "route": "/",
+            "target_locale": "fr",
+            "analysis": main.UNTRANSLATED_TEXT,
+        }]
+        mock_analyze.assert_not_called()
+
+
+class TestVisuallyIdentical:
+    def _jpeg(self, img):
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=85)
+        return buf.getvalue()
+
+    def test_same_render_is_identical(self):
+        shot = self._jpeg(Image.new("RGB", (64, 64), "white"))
+        assert main._visually_identical(shot, shot)
+
+    def test_changed_label_is_not_identical(self):
+        source = Image.new("RGB", (64, 64), "white")
+        target = source.copy()
+        target.paste((0, 0, 0), (10, 10, 20, 14))
+        assert not main._visually_identical(self._jpeg(source), self._jpeg(target))
+
+    def test_different_sizes_are_not_identical(self):
+        source = self._jpeg(Image.new("RGB", (64, 64), "white"))
+        target = self._jpeg(Image.new("RGB", (64, 80), "white"))
+        assert not main._visually_identical(source, target)
+
+
+class TestProbeRoute:
+    def _client(self, status, content_type):
+        def handler(request):
+            assert request.method == "HEAD"
+            return httpx.Response(status, headers={"content-type": content_type})
+        return httpx.Client(transport=httpx.MockTransport(handler))
+
+    def test_html_page_is_rendered(self):
+        with self._client(200, "text/html; charset=utf-8") as http:
+            assert main._probe_route(http, "https://example.com/en/") is None
+
+    def test_missing_page_is_skipped(self):
+        with self._client(404, "text/html") as http:
+            assert main._probe_route(http, "https://example.com/en/gone") == "HTTP 404"
+
+    def test_non_html_is_skipped(self):
+        with self._client(200, "application/pdf") as http:
+            reason = main._probe_route(http, "https://example.com/en/guide.pdf")
+        assert reason == "not an HTML page (application/pdf)"
+
+    def test_head_refused_falls_back_to_browser(self):
+        with self._client(405, "text/plain") as http:
+            assert main._probe_route(http, "https://example.com/en/guide.pdf") is None
+
+    def test_network_error_falls_back_to_browser(self):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+            assert main._probe_route(http, "https://example.com/en/") is None
+
+
+class TestCrawlState:
+    @patch("main.analyze_localization_batch")
+    def test_resumes_from_state_file(self, mock_analyze, tmp_path, fake_browser):
+        mock_analyze.return_value = ["No localization issues detected."]
+
+        state_file = tmp_path / "crawl.json"
+        earlier_issue = {"route": "/", "target_locale": "fr", "analysis": "- Header: truncated"}
+        state_file.write_text(json.dumps({
+            "base_url": "https://example.com",
+            "locales": ["en", "fr"],
+            "issues": [earlier_issue],
+            "visited": ["/"],
+            "queue": ["/about"],
+            "pages_crawled": 1,
+        }))
+
+        issues, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr"], max_pages=5, state_file=str(state_file)
+        )
+
+        assert pages_crawled == 2
+        assert issues == [earlier_issue]
+        assert fake_browser.page.urls == [
+            "https://example.com/en/about",
+            "https://example.com/fr/about",
+        ]
+        # A finished crawl leaves nothing to resume
+        assert not state_file.exists()
+
+    @patch("main.analyze_localization_batch")
+    def test_ignores_state_from_another_crawl(self, mock_analyze, tmp_path, fake_browser):
+        mock_analyze.return_value = ["No localization issues detected."]
+
+        state_file = tmp_path / "crawl.json"
+        state_file.write_text(json.dumps({
+            "base_url": "https://other.example",
+            "locales": ["en", "fr"],
+            "issues": [],
+            "visited": ["/"],
+            "queue": [],
+            "pages_crawled": 1,
+        }))
+
+        _, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr"], max_pages=5, state_file=str(state_file)
+        )
+
+        assert pages_crawled == 1
+        assert fake_browser.page.urls[0] == "https://example.com/en/"
+        # Not this crawl's checkpoint, so it is left alone
+        assert state_file.exists()
+
+    @pytest.mark.parametrize("content", [
+        [],
+        {"base_url": "https://example.com", "locales": ["en", "fr"]},
+        {
+            "base_url": "https://example.com", "locales": ["en", "fr"], "issues": [],
+            "visited": [1], "queue": [], "pages_crawled": 1,
+        },
+    ])
+    @patch("main.analyze_localization_batch")
+    def test_ignores_malformed_state(
+        self, mock_analyze, tmp_path, fake_browser, capsys, content
+    ):
+        mock_analyze.return_value = ["No localization issues detected."]
+        state_file = tmp_path / "crawl.json"
+        state_file.write_text(json.dumps(content))
+
+        _, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr"], max_pages=5, state_file=str(state_file)
+        )
+
+        assert pages_crawled == 1
+        assert "Ignoring unreadable crawl state" in capsys.readouterr().out
+        assert state_file.exists()
+
+    @patch("main.analyze_localization_batch")
+    def test_removes_checkpoint_it_wrote(self, mock_analyze, tmp_path, monkeypatch, fake_browser):
+        monkeypatch.setattr(main, "CHECKPOINT_INTERVAL", 1)
+        mock_analyze.return_value = ["No localization issues detected."]
+        fake_browser.page.link_fn = lambda: ["/en/about"]
+        state_file = tmp_path / "crawl.json"
+
+        _, pages_crawled = crawl_and_analyze(
+            "https://example.com", "en", ["fr"], max_pages=5, state_file=str(state_file)
+        )
+
+        assert pages_crawled == 2
+        assert not state_file.exists()
+
+    @patch("main.analyze_localization_batch")
+    def test_checkpoint_survives_failure(
+        self, mock_analyze, tmp_path, monkeypatch, fake_browser
+    ):
+        monkeypatch.setattr(main, "CHECKPOINT_INTERVAL", 1)
+        mock_analyze.side_effect = [
+            ["- Header: truncated"],
+            ["No localization issues detected."],
+            RuntimeError("Gemini down"),
+        ]
+        counter = {"val": 0}
+
+        def new_links():
+            counter["val"] += 1
+            return [f"/en/page{counter['val']}"]
+
+        fake_browser.page.link_fn = new_links
+
+        state_file = tmp_path / "crawl.json"
+        with pytest.raises(RuntimeError, match="Gemini down"):
+            crawl_and_analyze(
+                "https://example.com", "en", ["fr"], max_pages=3, state_file=str(state_file)
+            )
+
+        state = json.loads(state_file.read_text())
+        assert state["pages_crawled"] == 2
+        assert state["visited"] == ["/", "/page1", "/page2"]
+        assert state["queue"] == ["/page2"]
+        assert [i["route"] for i in state["issues"]] == ["/"]
+
+
+class TestCrawlTiled:
+    @patch("main.analyze_localization_batch")
+    @patch("main._capture")
+    def test_tiles_are_analyzed_as_separate_pairs(
+        self, mock_capture, mock_analyze, fake_browser
+    ):
+        mock_capture.side_effect = lambda page: [b"top", b"bottom"]
+        mock_analyze.side_effect = lambda pairs: [
+            "No localization issues detected.",
+            "- Footer: clipped",
+        ]
+
+        issues, _ = crawl_and_analyze("https://example.com", "en", ["fr"], max_pages=1)
+
+        assert mock_analyze.call_args.args[0] == [
+            (b"top", b"top"),
+            (b"bottom", b"bottom"),
+        ]
+        assert issues == [{
+            "route": "/",
+            "target_locale": "fr",
+            "analysis": "Tile 2/2:\n- Footer: clipped",
+        }]
 
 
 # ---------------------------------------------------------------------------
@@ -344,13 +838,13 @@ class TestAnalyzeLocalization:
             analyze_localization("a.png", "b.png")
 
     @patch("main.genai.Client")
-    @patch("main.Image.open")
+    @patch("main._image_part")
     def test_returns_model_response(self, mock_open, mock_client_cls, monkeypatch):
         monkeypatch.setenv("GEMINI_API_KEY", "test-key")
         mock_open.return_value = MagicMock()
 
         mock_response = MagicMock()
-        mock_response.text = "No localization issues detected."
+        mock_response.text = '{"has_issues": false, "issues": []}'
         mock_client = MagicMock()
         mock_client.models.generate_content.return_value = mock_response
         mock_client_cls.return_value = mock_client
@@ -359,9 +853,53 @@ class TestAnalyzeLocalization:
 
         assert result == "No localization issues detected."
         mock_client.models.generate_content.assert_called_once()
+        config = mock_client.models.generate_content.call_args.kwargs["config"]
+        assert config.response_mime_type == "application/json"
+
+    @patch("main.genai.Client")
+    @patch("main._image_part")
+    def test_formats_structured_issues(self, mock_open, mock_client_cls, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+        mock_response = MagicMock()
+        mock_response.text = (
+            '{"has_issues": true, "issues": ["Header: truncated → widen",'
+            ' "- Button: overflow → shorten"]}'
+        )
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = mock_response
+        mock_client_cls.return_value = mock_client
+
+        result = analyze_localization("source.png", "target.png")
+
+        assert result == "- Header: truncated → widen\n- Button: overflow → shorten"
+
+    @patch("main.genai.Client")
+    @patch("main._image_part")
+    def test_free_text_response_passed_through(self, mock_open, mock_client_cls, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+        mock_response = MagicMock()
+        mock_response.text = "- Header: text truncated"
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = mock_response
+        mock_client_cls.return_value = mock_client
+
+        assert analyze_localization("source.png", "target.png") == "- Header: text truncated"
 
     @patch("main.genai.Client")
-    @patch("main.Image.open")
+    @patch("main._image_part")
+    def test_free_text_clean_verdict_normalized(self, mock_open, mock_client_cls, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+        mock_response = MagicMock()
+        mock_response.text = "Looks good: no localization issues found."
+        mock_client_cls.return_value.models.generate_content.return_value = mock_response
+
+        assert analyze_localization("source.png", "target.png") == "No localization issues detected."
+
+    @patch("main.genai.Client")
+    @patch("main._image_part")
     def test_custom_prompt_passed_to_model(self, mock_open, mock_client_cls, monkeypatch):
         monkeypatch.setenv("GEMINI_API_KEY", "test-key")
         mock_open.return_value = MagicMock()
@@ -376,22 +914,272 @@ class TestAnalyzeLocalization:
 
         call_args = mock_client.models.generate_content.call_args
         contents = call_args.kwargs.get("contents") or call_args[1].get("contents")
-        assert contents[-1] == "custom prompt"
+        assert contents[0] == "custom prompt"
 
 
 # ---------------------------------------------------------------------------
-# _extract_same_domain_links (additional edge cases)
+# analyze_localization_batch
 # ---------------------------------------------------------------------------
 
 
-class TestExtractSameDomainLinksEdgeCases:
-    def test_relative_path_without_leading_slash(self):
-        mock_page = MagicMock()
-        mock_page.eval_on_selector_all.return_value = [
-            "about",  # relative, no netloc
-        ]
-        result = _extract_same_domain_links(mock_page, "https://example.com")
-        assert result == {"/about"}
+class TestImagePart:
+    def test_sends_webp(self, tmp_path):
+        path = tmp_path / "shot.png"
+        Image.new("RGB", (4, 4), "white").save(path)
+
+        part = main._image_part(str(path))
+
+        assert part.inline_data.mime_type == "image/webp"
+        assert part.inline_data.data[8:12] == b"WEBP"
+
+    def test_accepts_encoded_bytes(self):
+        buf = io.BytesIO()
+        Image.new("RGB", (4, 4), "white").save(buf, format="PNG")
+
+        with Image.open(io.BytesIO(main._prepare_image(buf.getvalue()))) as img:
+            assert img.size == (4, 4)
+            assert img.format == "WEBP"
+
+    def test_downscales_wide_screenshots(self, tmp_path):
+        path = tmp_path / "wide.png"
+        Image.new("RGBA", (2048, 1536), "white").save(path)
+
+        with Image.open(io.BytesIO(main._prepare_image(str(path)))) as img:
+            assert img.size == (1024, 768)
+            assert img.format == "WEBP"
+
+    def test_tall_screenshots_keep_their_height(self, tmp_path):
+        path = tmp_path / "tall.png"
+        Image.new("RGBA", (1080, 4320), "white").save(path)
+
+        with Image.open(io.BytesIO(main._prepare_image(str(path)))) as img:
+            assert img.size == (1024, 4096)
+
+    def test_small_screenshots_keep_their_size(self, tmp_path):
+        path = tmp_path / "small.png"
+        Image.new("RGB", (320, 480), "white").save(path)
+
+        with Image.open(io.BytesIO(main._prepare_image(str(path)))) as img:
+            assert img.size == (320, 480)
+
+
+class TestGetClient:
+    @patch("main.genai.Client")
+    def test_client_is_reused(self, mock_client_cls, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        assert main._get_client() is main._get_client()
+        mock_client_cls.assert_called_once_with(api_key="test-key")
+
+    @patch("main.genai.Client")
+    def test_new_key_builds_new_client(self, mock_client_cls, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "key-1")
+        main._get_client()
+        monkeypatch.setenv("GEMINI_API_KEY", "key-2")
+        main._get_client()
+        assert mock_client_cls.call_count == 2
+
+
+class TestGenerateContent:
+    def test_caps_requests_in_flight(self, monkeypatch):
+        monkeypatch.setattr(main, "_gemini_slots", threading.BoundedSemaphore(2))
+        lock = threading.Lock()
+        active = peak = 0
+
+        def fake_generate(**kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return MagicMock(text="ok")
+
+        client = MagicMock()
+        client.models.generate_content.side_effect = fake_generate
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(
+                lambda _: main._generate_content(client, ["x"], 1), range(6)
+            ))
+
+        assert results == [("ok", main.GEMINI_MODELS[0])] * 6
+        assert peak == 2
+
+    @pytest.mark.parametrize("value, expected", [
+        (None, 8), ("4", 4), (" 2 ", 2), ("0", 1), ("-3", 1), ("lots", 8), ("", 8),
+    ])
+    def test_concurrency_from_env(self, value, expected):
+        assert main._concurrency_from_env(value) == expected
+
+
+class TestAnalyzeLocalizationBatch:
+    def test_empty_pairs_skips_request(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        assert analyze_localization_batch([]) == []
+
+    def test_missing_api_key_raises(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        with pytest.raises(RuntimeError, match="GEMINI_API_KEY"):
+            analyze_localization_batch([("a.png", "b.png")])
+
+    @patch("main.genai.Client")
+    @patch("main._image_part")
+    def test_single_request_for_all_pairs(self, mock_open, mock_client_cls, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        mock_open.return_value = MagicMock()
+
+        mock_response = MagicMock()
+        mock_response.text = (
+            '[{"index": 1, "has_issues": true, "issues": ["Button: truncated"]},'
+            ' {"index": 0, "has_issues": false, "issues": []}]'
+        )
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = mock_response
+        mock_client_cls.return_value = mock_client
+
+        result = analyze_localization_batch([("s1.png", "t1.png"), ("s2.png", "t2.png")])
+
+        assert result == ["No localization issues detected.", "- Button: truncated"]
+        mock_client.models.generate_content.assert_called_once()
+        config = mock_client.models.generate_content.call_args.kwargs["config"]
+        assert config.response_mime_type == "application/json"
+
+    @patch("main.genai.Client")
+    @patch("main._image_part")
+    def test_missing_entry_falls_back_to_single_request(
+        self, mock_open, mock_client_cls, monkeypatch
+    ):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        mock_open.return_value = MagicMock()
+
+        batch_response = MagicMock()
+        batch_response.text = '[{"index": 0, "has_issues": true, "issues": ["batch result"]}]'
+        single_response = MagicMock()
+        single_response.text = '{"has_issues": true, "issues": ["single result"]}'
+        mock_client = MagicMock()
+        mock_client.models.generate_content.side_effect = [batch_response, single_response]
+        mock_client_cls.return_value = mock_client
+
+        result = analyze_localization_batch([("s1.png", "t1.png"), ("s2.png", "t2.png")])
+
+        assert result == ["- batch result", "- single result"]
+        assert mock_client.models.generate_content.call_count == 2
+
+
+class TestLLMCache:
+    @pytest.fixture(autouse=True)
+    def _cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("PRISM_CACHE_DISABLE", raising=False)
+        monkeypatch.setattr(main, "CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(main, "cache_stats", {"hits": 0, "misses": 0})
+
+    def _write_pngs(self, tmp_path):
+        source = tmp_path / "s.png"
+        target = tmp_path / "t.png"
+        Image.new("RGB", (4, 4), "white").save(source)
+        Image.new("RGB", (4, 4), "black").save(target)
+        return str(source), str(target)
+
+    def test_key_depends_on_image_contents(self, tmp_path):
+        source, target = self._write_pngs(tmp_path)
+        key = _cache_key("m", source, target, "p")
+        assert key == _cache_key("m", source, target, "p")
+        assert key != _cache_key("m", target, source, "p")
+        assert key != _cache_key("m", source, target, "other prompt")
+
+    def test_bytes_and_path_share_a_key(self, tmp_path):
+        source, target = self._write_pngs(tmp_path)
+        with open(source, "rb") as f:
+            source_bytes = f.read()
+        assert _cache_key("m", source_bytes, target, "p") == _cache_key("m", source, target, "p")
+
+    def test_round_trip(self):
+        assert _cache_get("abc") is None
+        _cache_put("abc", "- Header: truncated")
+        assert _cache_get("abc") == "- Header: truncated"
+        assert main.cache_stats == {"hits": 1, "misses": 1}
+
+    def test_expired_entry_is_a_miss(self, monkeypatch):
+        _cache_put("abc", "stale")
+        monkeypatch.setattr(main, "CACHE_TTL_SECONDS", -1)
+        assert _cache_get("abc") is None
+
+    @pytest.mark.parametrize("content", ["[]", '{"created": 0}', '{"analysis": "x"}', '{"created": "now", "analysis": "x"}'])
+    def test_malformed_entry_is_a_miss(self, content):
+        os.makedirs(main.CACHE_DIR)
+        with open(os.path.join(main.CACHE_DIR, "abc.json"), "w") as f:
+            f.write(content)
+        assert _cache_get("abc") is None
+        assert main.cache_stats == {"hits": 0, "misses": 1}
+
+    def test_put_failure_is_reported_not_raised(self, monkeypatch, capsys):
+        def fail(*args, **kwargs):
+            raise OSError(28, "No space left on device")
+
+        monkeypatch.setattr(main.os, "replace", fail)
+        _cache_put("abc", "analysis")
+        assert "Not caching analysis" in capsys.readouterr().out
+        assert os.listdir(main.CACHE_DIR) == []
+
+    @patch("main.genai.Client")
+    def test_unwritable_cache_still_returns_analysis(self, mock_client_cls, tmp_path, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+        monkeypatch.setattr(main, "CACHE_DIR", str(blocker / "cache"))
+        source, target = self._write_pngs(tmp_path)
+
+        mock_response = MagicMock()
+        mock_response.text = "- Header: truncated"
+        mock_client_cls.return_value.models.generate_content.return_value = mock_response
+
+        assert analyze_localization(source, target) == "- Header: truncated"
+
+    @patch("main.genai.Client")
+    def test_fallback_model_answer_not_cached(self, mock_client_cls, tmp_path, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        source, target = self._write_pngs(tmp_path)
+
+        def generate(model, **kwargs):
+            if model == main.GEMINI_MODELS[0]:
+                raise Exception("503 UNAVAILABLE")
+            return MagicMock(text='{"has_issues": false, "issues": []}')
+
+        mock_client_cls.return_value.models.generate_content.side_effect = generate
+
+        assert analyze_localization(source, target, max_retries=1) == "No localization issues detected."
+        assert not os.path.exists(main.CACHE_DIR)
+
+    @patch("main.genai.Client")
+    def test_second_call_served_from_cache(self, mock_client_cls, tmp_path, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        source, target = self._write_pngs(tmp_path)
+
+        mock_response = MagicMock()
+        mock_response.text = "No localization issues detected."
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = mock_response
+        mock_client_cls.return_value = mock_client
+
+        assert analyze_localization(source, target) == "No localization issues detected."
+        assert analyze_localization(source, target) == "No localization issues detected."
+        mock_client.models.generate_content.assert_called_once()
+
+
+class TestParseBatchResponse:
+    def test_invalid_json(self):
+        assert _parse_batch_response("not json", 2) == [None, None]
+
+    def test_ignores_out_of_range_and_malformed_entries(self):
+        text = (
+            '[{"index": 5, "has_issues": true, "issues": ["x"]}, {"index": 0},'
+            ' "junk", {"index": 1, "has_issues": true, "issues": ["ok"]}]'
+        )
+        assert _parse_batch_response(text, 2) == [None, "- ok"]
+
+    def test_has_issues_false_means_no_issues(self):
+        text = '[{"index": 0, "has_issues": false, "issues": ["ignored"]}]'
+        assert _parse_batch_response(text, 1) == ["No localization issues detected."]
 
 
 # ---------------------------------------------------------------------------
@@ -400,29 +1188,10 @@ class TestExtractSameDomainLinksEdgeCases:
 
 
 class TestCrawlAndAnalyzeTargetError:
-    @patch("main.sync_playwright")
-    @patch("main.analyze_localization")
-    def test_skips_target_on_navigation_error(self, mock_analyze, mock_pw_ctx):
+    @patch("main.analyze_localization_batch")
+    def test_skips_target_on_navigation_error(self, mock_analyze, fake_browser):
         """If a target locale page fails to load, it's skipped but source still works."""
-        mock_page = MagicMock()
-        mock_browser = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_pw = MagicMock()
-        mock_pw.chromium.launch.return_value = mock_browser
-        mock_pw_ctx.return_value.__enter__ = MagicMock(return_value=mock_pw)
-        mock_pw_ctx.return_value.__exit__ = MagicMock(return_value=False)
-
-        mock_page.eval_on_selector_all.return_value = []
-
-        # First goto (source) succeeds, second (target) fails
-        call_num = {"n": 0}
-
-        def goto_side_effect(url, **kwargs):
-            call_num["n"] += 1
-            if call_num["n"] == 2:  # target locale goto
-                raise Exception("Timeout")
-
-        mock_page.goto.side_effect = goto_side_effect
+        fake_browser.page.fail_urls = {"https://example.com/fr/"}
 
         issues, pages_crawled = crawl_and_analyze(
             "https://example.com", "en", ["fr"], max_pages=1
@@ -430,47 +1199,199 @@ class TestCrawlAndAnalyzeTargetError:
 
         assert pages_crawled == 1
         assert issues == []
+        assert fake_browser.page.urls == ["https://example.com/en/", "https://example.com/fr/"]
         mock_analyze.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
-# CLI __main__ block
+# _group_device_dirs
 # ---------------------------------------------------------------------------
 
 
-class TestCLI:
-    def test_no_args_shows_usage(self):
-        result = subprocess.run(
-            [sys.executable, "main.py"],
-            capture_output=True, text=True,
-            cwd="/Users/raunak/Code/gemini-hackathon/diamond",
-        )
-        assert result.returncode == 1
-        assert "Usage:" in result.stdout
-
-    def test_unknown_command(self):
-        result = subprocess.run(
-            [sys.executable, "main.py", "bogus"],
-            capture_output=True, text=True,
-            cwd="/Users/raunak/Code/gemini-hackathon/diamond",
-        )
-        assert result.returncode == 1
-        assert "Unknown command: bogus" in result.stdout
-
-    def test_analyze_missing_args(self):
-        result = subprocess.run(
-            [sys.executable, "main.py", "analyze"],
-            capture_output=True, text=True,
-            cwd="/Users/raunak/Code/gemini-hackathon/diamond",
-        )
-        assert result.returncode == 1
-        assert "analyze <source_image>" in result.stdout
-
-    def test_crawl_missing_args(self):
-        result = subprocess.run(
-            [sys.executable, "main.py", "crawl", "https://example.com"],
-            capture_output=True, text=True,
-            cwd="/Users/raunak/Code/gemini-hackathon/diamond",
+class TestGroupDeviceDirs:
+    def test_flat_structure(self, tmp_path):
+        (tmp_path / "starlte-29-en-portrait").mkdir()
+        (tmp_path / "starlte-29-fr-portrait").mkdir()
+        (tmp_path / "notes.txt").write_text("not a device")
+
+        groups = main._group_device_dirs(str(tmp_path))
+
+        assert groups == {
+            "starlte-29-portrait": {
+                "en": str(tmp_path / "starlte-29-en-portrait"),
+                "fr": str(tmp_path / "starlte-29-fr-portrait"),
+            }
+        }
+
+    def test_nested_structure_prefers_artifacts(self, tmp_path):
+        en_dir = tmp_path / "en" / "ftl-results-1" / "redfin-30-en-portrait"
+        fr_dir = tmp_path / "fr" / "ftl-results-1" / "redfin-30-fr-portrait"
+        (en_dir / "artifacts").mkdir(parents=True)
+        fr_dir.mkdir(parents=True)
+
+        groups = main._group_device_dirs(str(tmp_path))
+
+        assert groups == {
+            "redfin-30-portrait": {
+                "en": str(en_dir / "artifacts"),
+                "fr": str(fr_dir),
+            }
+        }
+
+    def test_latest_results_dir_wins(self, tmp_path):
+        for run in ("ftl-results-2", "ftl-results-1"):
+            (tmp_path / "en" / run / "redfin-30-en-portrait").mkdir(parents=True)
+
+        groups = main._group_device_dirs(str(tmp_path))
+
+        assert groups["redfin-30-portrait"]["en"] == str(
+            tmp_path / "en" / "ftl-results-2" / "redfin-30-en-portrait"
         )
-        assert result.returncode == 1
-        assert "crawl <base_url>" in result.stdout
+
+
+# ---------------------------------------------------------------------------
+# ftl_analyze
+# ---------------------------------------------------------------------------
+
+
+class TestFtlAnalyze:
+    def _make_device_dir(self, root, name, files):
+        device_dir = root / name
+        device_dir.mkdir()
+        for filename, color in files.items():
+            Image.new("RGB", (4, 4), color).save(device_dir / filename)
+
+    def test_missing_dir_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            ftl_analyze(str(tmp_path / "missing"), "en", ["fr"])
+
+    @patch("main.analyze_localization_batch")
+    def test_batches_at_most_batch_size_pairs(self, mock_analyze, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "BATCH_SIZE", 2)
+        mock_analyze.side_effect = lambda pairs: ["- Title: truncated"] * len(pairs)
+        names = ["a.png", "b.png", "c.png"]
+        # Distinct contents, so no pair shares another's result
+        self._make_device_dir(tmp_path, "pixel5-30-en-portrait", dict(zip(names, ["white", "gray", "black"])))
+        self._make_device_dir(tmp_path, "pixel5-30-fr-portrait", dict(zip(names, ["red", "green", "blue"])))
+
+        issues = ftl_analyze(str(tmp_path), "en", ["fr"])
+
+        assert [len(c.args[0]) for c in mock_analyze.call_args_list] == [2, 1]
+        assert sorted(i["filename"] for i in issues) == names
+
+    @patch("main.analyze_localization_batch")
+    def test_reports_issues_per_device(self, mock_analyze, tmp_path):
+        mock_analyze.side_effect = lambda pairs: [
+            "- Title: truncated" if "b.png" in source else "No localization issues detected."
+            for source, _ in pairs
+        ]
+        for device, shade in (("pixel5-30", "gray"), ("starlte-29", "black")):
+            self._make_device_dir(tmp_path, f"{device}-en-portrait", {"a.png": "white", "b.png": shade})
+            self._make_device_dir(tmp_path, f"{device}-fr-portrait", {"a.png": "red", "b.png": "blue"})
+
+        issues = ftl_analyze(str(tmp_path), "en", ["fr"])
+
+        # Device order follows the directory listing
+        assert sorted((i["device"], i["filename"]) for i in issues) == [
+            ("pixel5-30-portrait", "b.png"),
+            ("starlte-29-portrait", "b.png"),
+        ]
+        assert all(i["target_locale"] == "fr" for i in issues)
+
+    @patch("main.analyze_localization_batch")
+    def test_sink_receives_each_issue(self, mock_analyze, tmp_path):
+        mock_analyze.side_effect = lambda pairs: ["- Title: truncated"] * len(pairs)
+        self._make_device_dir(tmp_path, "pixel5-30-en-portrait", {"a.png": "white", "b.png": "white"})
+        self._make_device_dir(tmp_path, "pixel5-30-fr-portrait", {"a.png": "red", "b.png": "red"})
+
+        out = io.StringIO()
+        issues = ftl_analyze(str(tmp_path), "en", ["fr"], sink=main._jsonl_sink(out))
+
+        streamed = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert sorted(streamed, key=lambda i: i["filename"]) == issues
+
+    @patch("main.analyze_localization_batch")
+    def test_same_screens_on_other_devices_reuse_result(self, mock_analyze, tmp_path):
+        mock_analyze.side_effect = lambda pairs: ["- Title: truncated"] * len(pairs)
+        for device in ("pixel5-30", "starlte-29"):
+            self._make_device_dir(tmp_path, f"{device}-en-portrait", {"a.png": "white"})
+            self._make_device_dir(tmp_path, f"{device}-fr-portrait", {"a.png": "red"})
+
+        issues = ftl_analyze(str(tmp_path), "en", ["fr"])
+
+        assert sorted(i["device"] for i in issues) == ["pixel5-30-portrait", "starlte-29-portrait"]
+        sent = [pair for call in mock_analyze.call_args_list for pair in call.args[0]]
+        assert len(sent) == 1
+
+    @patch("main.analyze_localization_batch")
+    def test_identical_pairs_skip_model(self, mock_analyze, tmp_path):
+        mock_analyze.side_effect = lambda pairs: ["- Title: truncated"] * len(pairs)
+        self._make_device_dir(tmp_path, "pixel5-30-en-portrait", {"a.png": "white", "b.png": "white"})
+        self._make_device_dir(tmp_path, "pixel5-30-fr-portrait", {"a.png": "white", "b.png": "red"})
+
+        issues = ftl_analyze(str(tmp_path), "en", ["fr"])
+
+        assert [i["filename"] for i in issues] == ["b.png"]
+        sent = [pair for call in mock_analyze.call_args_list for pair in call.args[0]]
+        assert len(sent) == 1
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+class TestCLI:
+    def test_no_args_shows_usage(self, capsys):
+        assert main.main([]) == 1
+        assert "Usage:" in capsys.readouterr().out
+
+    def test_unknown_command(self, capsys):
+        assert main.main(["bogus"]) == 1
+        assert "Unknown command: bogus" in capsys.readouterr().out
+
+    def test_analyze_missing_args(self, capsys):
+        assert main.main(["analyze"]) == 1
+        assert "analyze <source_image>" in capsys.readouterr().out
+
+    def test_crawl_missing_args(self, capsys):
+        assert main.main(["crawl", "https://example.com"]) == 1
+        assert "crawl <base_url>" in capsys.readouterr().out
+
+    def test_ftl_analyze_missing_dir(self, capsys, tmp_path):
+        missing = str(tmp_path / "nonexistent")
+        assert main.main(["ftl-analyze", missing, "en", "fr"]) == 1
+        assert f"Screenshots directory not found: {missing}" in capsys.readouterr().out
+        assert not os.path.exists(missing)
+
+    @patch("main.analyze_localization_batch")
+    def test_ftl_analyze_streams_issues(self, mock_analyze, capsys, tmp_path):
+        mock_analyze.return_value = ["- Header: truncated"]
+        for locale, color in [("en", "white"), ("fr", "black")]:
+            device_dir = tmp_path / f"Pixel2-28-{locale}-portrait"
+            device_dir.mkdir()
+            Image.new("RGB", (4, 4), color).save(device_dir / "home.png")
+
+        assert main.main(["ftl-analyze", str(tmp_path), "en", "fr"]) == 0
+
+        lines = (tmp_path / "issues.jsonl").read_text().splitlines()
+        assert [json.loads(line)["filename"] for line in lines] == ["home.png"]
+        assert "FTL LOCALIZATION DRIFT REPORT" in capsys.readouterr().out
+
+    def test_ftl_analyze_read_only_dir_still_reports(self, capsys, tmp_path, monkeypatch):
+        def read_only(path, *args, **kwargs):
+            raise PermissionError(13, "Permission denied", path)
+
+        monkeypatch.setattr(main, "open", read_only, raising=False)
+
+        assert main.main(["ftl-analyze", str(tmp_path), "en", "fr"]) == 0
+        output = capsys.readouterr().out
+        assert "issues will only be printed" in output
+        assert "FTL LOCALIZATION DRIFT REPORT" in output
+
+    @patch("main.analyze_localization")
+    def test_analyze_prints_result(self, mock_analyze, capsys):
+        mock_analyze.return_value = "- Header: truncated"
+        assert main.main(["analyze", "a.png", "b.png"]) == 0
+        mock_analyze.assert_called_once_with("a.png", "b.png")
+        assert "- Header: truncated" in capsys.readouterr().out